@@ -1,24 +1,49 @@
+import bisect
 from functools import partial
+import hashlib
+import itertools
 import os
 import re
 import sys
 import time
 import threading
+import traceback
 
 import sublime
 import sublime_plugin
 
-from sublimelinter.loader import Loader
-from sublimelinter.modules.base_linter import INPUT_METHOD_FILE
-
-LINTERS = {}     # mapping of language name to linter module
+from sublimelinter.annotations_index import AnnotationsIndex, iter_project_files
+from sublimelinter.lint_cache import LintCache, cached_run
+from sublimelinter.loader import LazyLinters, Loader
+from sublimelinter.mark_painter import MarkLayer, MarkPainter
+from sublimelinter.metrics import METRICS
+from sublimelinter.region_lint import StandInView, lint_region, merge_result, window_region
+from sublimelinter.tracing import TRACER
+from sublimelinter.modules.base_linter import ALL_SETTINGS, INPUT_METHOD_FILE, forget_text, get_view_settings, \
+    invalidate_view_settings, mark_dirty, note_selection, release_text_snapshot, take_text_snapshot
+
+LINTERS = LazyLinters()  # mapping of language name to linter module; modules
+                 # are imported the first time their language is looked up
 QUEUE = {}       # views waiting to be processed by linter
 ERRORS = {}      # error messages on given line obtained from linter; they are
                  # displayed in the status bar when cursor is on line with error
 VIOLATIONS = {}  # violation messages, they are displayed in the status bar
 WARNINGS = {}    # warning messages, they are displayed in the status bar
 UNDERLINES = {}  # underline regions related to each lint message
+STATUS = {}      # status bar text of each line with messages, made from the
+                 # messages above once per lint
 TIMES = {}       # collects how long it took the linting to complete
+LINT_RESULTS = {}  # text size, line count and result of the last lint of each
+                 # view, which the lints of a region of a huge file update
+GENERATIONS = {}  # counts the modifications of each view, to tell whether an
+                 # idle lint of a huge file was started before the last one
+IDLE_LINTS = set()  # ids of the views of huge files being linted at idle
+PAINTERS = {}    # painters of the lint marks of each view, which paint the
+                 # marks of large results a batch at a time
+SEVERITIES = (('error', ERRORS), ('violation', VIOLATIONS), ('warning', WARNINGS))  # message stores
+VIEWS = set()    # ids of the views that are open, maintained by view events
+ANNOTATIONS_INDEXES = {}  # project annotation indexes, keyed by project folders
+LINT_CACHE = LintCache()  # persistent lint results, shared with the command line
 MOD_LOAD = Loader(os.getcwdu(), LINTERS)  # utility to load (and reload
                  # if necessary) linter modules [useful when working on plugin]
 
@@ -46,40 +71,12 @@ ORIGINAL_MARK_THEME = {
     'illegal': 'circle'
 }
 
-# All available settings for SublimeLinter;
-# only these are inherited from SublimeLinter.sublime-settings
-ALL_SETTINGS = [
-    'annotations',
-    'csslint_options',
-    'gjslint_ignore',
-    'gjslint_options',
-    'golint_options',
-    'javascript_linter',
-    'jshint_options',
-    'jslint_options',
-    'pep8',
-    'pep8_ignore',
-    'perl_linter',
-    'pyflakes_ignore',
-    'pyflakes_ignore_import_*',
-    'sublimelinter',
-    'sublimelinter_delay',
-    'sublimelinter_disable',
-    'sublimelinter_executable_map',
-    'sublimelinter_fill_outlines',
-    'sublimelinter_gutter_marks',
-    'sublimelinter_gutter_marks_theme',
-    'sublimelinter_mark_style',
-    'sublimelinter_notes',
-    'sublimelinter_objj_check_ascii',
-    'sublimelinter_popup_errors_on_save',
-    'sublimelinter_syntax_map',
-    'sublimelinter_wrap_find',
-]
-
-
 WHITESPACE_RE = re.compile(r'\s+')
 
+# The error list shows this many messages at a time; when there are more,
+# it first asks which severities to list
+ERROR_LIST_PAGE_SIZE = 500
+
 
 def get_delay(t, view):
     delay = 0
@@ -94,7 +91,7 @@ def get_delay(t, view):
 
     # If the user specifies a delay greater than the built in delay,
     # figure they only want to see marks when idle.
-    minDelay = int(view.settings().get('sublimelinter_delay', 0) * 1000)
+    minDelay = int(get_view_settings(view).get('sublimelinter_delay', 0) * 1000)
 
     if minDelay > delay[1]:
         erase_lint_marks(view)
@@ -109,23 +106,26 @@ def last_selected_lineno(view):
     return view.rowcol(viewSel[0].end())[0]
 
 
-def update_statusbar(view):
-    vid = view.id()
-    lineno = last_selected_lineno(view)
-    errors = []
+def status_messages(errors, violations, warnings):
+    '''returns the status bar text of each line with messages'''
+    lines = {}
 
-    if lineno is not None:
-        if vid in ERRORS and lineno in ERRORS[vid]:
-            errors.extend(ERRORS[vid][lineno])
+    for messages in (errors, violations, warnings):
+        for line, line_messages in messages.iteritems():
+            if line in lines:
+                lines[line] = lines[line] + line_messages
+            else:
+                lines[line] = line_messages
+
+    return dict((line, '; '.join(line_messages)) for line, line_messages in lines.iteritems())
 
-        if vid in VIOLATIONS and lineno in VIOLATIONS[vid]:
-            errors.extend(VIOLATIONS[vid][lineno])
 
-        if vid in WARNINGS and lineno in WARNINGS[vid]:
-            errors.extend(WARNINGS[vid][lineno])
+def update_statusbar(view):
+    lineno = last_selected_lineno(view)
+    status = STATUS.get(view.id())
 
-    if errors:
-        view.set_status('Linter', '; '.join(errors))
+    if lineno is not None and status and lineno in status:
+        view.set_status('Linter', status[lineno])
     else:
         view.erase_status('Linter')
 
@@ -139,61 +139,242 @@ def run_once(linter, view, **kwargs):
     ERRORS[vid] = {}
     VIOLATIONS[vid] = {}
     WARNINGS[vid] = {}
+    STATUS[vid] = {}
     start = time.time()
-    text = view.substr(sublime.Region(0, view.size())).encode('utf-8')
-    lines, error_underlines, violation_underlines, warning_underlines, ERRORS[vid], VIOLATIONS[vid], WARNINGS[vid] = linter.run(view, text, (view.file_name() or '').encode('utf-8'))
+    language = linter.language
+
+    with TRACER.span('lint', 'lint', view=vid, linter=language):
+        with METRICS.timer(language, 'settings'):
+            settings = get_view_settings(view)
+
+        with METRICS.timer(language, 'text'):
+            snapshot = take_text_snapshot(view)
+
+        try:
+            result = cached_run(get_lint_cache(settings), linter, view, snapshot.encoded, (view.file_name() or '').encode('utf-8'))
+            apply_result(view, language, result, len(snapshot.text), view.rowcol(view.size())[0] + 1)
+
+            if settings.get('sublimelinter_notes'):
+                highlight_notes(view, snapshot.text)
+        finally:
+            release_text_snapshot(vid)
+
+        update_statusbar(view)
+        end = time.time()
+        TIMES[vid] = (end - start) * 1000  # Keep how long it took to lint
+        METRICS.record(language, 'total', TIMES[vid])
+
+    if kwargs.get('event', None) == 'on_post_save' and settings.get('sublimelinter_popup_errors_on_save'):
+        popup_error_list(view)
+
+
+def get_lint_cache(settings):
+    '''returns the lint result cache, or None if it is disabled'''
+    if not settings.get('sublimelinter_result_cache', True):
+        return None
+
+    LINT_CACHE.max_size = settings.get('sublimelinter_result_cache_size', 64) * 1024 * 1024
+    return LINT_CACHE
+
+
+def apply_result(view, language, result, size, row_count):
+    '''keeps the messages of a lint result and marks them in view; size and
+       row_count are those of the linted text'''
+    vid = view.id()
+    lines, error_underlines, violation_underlines, warning_underlines, ERRORS[vid], VIOLATIONS[vid], WARNINGS[vid] = result
+    STATUS[vid] = status_messages(ERRORS[vid], VIOLATIONS[vid], WARNINGS[vid])
+    LINT_RESULTS[vid] = (size, row_count, result)
 
     UNDERLINES[vid] = error_underlines[:]
     UNDERLINES[vid].extend(violation_underlines)
     UNDERLINES[vid].extend(warning_underlines)
 
-    add_lint_marks(view, lines, error_underlines, violation_underlines, warning_underlines)
+    with METRICS.timer(language, 'render'):
+        add_lint_marks(view, lines, error_underlines, violation_underlines, warning_underlines)
+
+
+def is_huge_file(linter, view):
+    '''returns True if view is linted a region at a time while it is modified'''
+    huge_size = get_view_settings(view).get('sublimelinter_huge_file_size', 500000)
+    return bool(huge_size) and view.size() > huge_size and linter.input_method != INPUT_METHOD_FILE and linter.lints_regions
+
+
+def lint_visible_region(linter, view):
+    '''lints the visible lines of a huge file and a margin around them, and
+       keeps the marks of the other lines from the last lint'''
+    vid = view.id()
+    start = time.time()
+    language = linter.language
+
+    with TRACER.span('lint region', 'lint', view=vid, linter=language):
+        settings = get_view_settings(view)
+        margin = settings.get('sublimelinter_huge_file_margin', 100)
+        visible = view.visible_region()
+        region, first_row, end_row = window_region(view, view.rowcol(visible.begin())[0] - margin, view.rowcol(visible.end())[0] + margin)
+
+        with METRICS.timer(language, 'text'):
+            snapshot = take_text_snapshot(view)
+
+        try:
+            size = len(snapshot.text)
+            row_count = view.rowcol(size)[0] + 1
+            result = lint_region(linter, view, settings.values(), snapshot.text, region, first_row)
+            apply_result(view, language, merge_result(LINT_RESULTS.get(vid), result, region, first_row, end_row, size, row_count), size, row_count)
+        finally:
+            release_text_snapshot(vid)
+
+        update_statusbar(view)
+        TIMES[vid] = (time.time() - start) * 1000
+        METRICS.record(language, 'region', TIMES[vid])
+
 
-    if view.settings().get('sublimelinter_notes'):
-        highlight_notes(view)
+def schedule_idle_lint(linter, view, generation=None):
+    '''lints the whole of a huge file in the background, if it is not modified
+       for sublimelinter_huge_file_idle_delay seconds'''
+    if generation is None:
+        generation = GENERATIONS.get(view.id(), 0)
+
+    delay = get_view_settings(view).get('sublimelinter_huge_file_idle_delay', 2)
+    sublime.set_timeout(partial(start_idle_lint, linter, view, generation), int(delay * 1000))
+
+
+def start_idle_lint(linter, view, generation):
+    vid = view.id()
+
+    # Modified since: the modification scheduled its own idle lint
+    if GENERATIONS.get(vid, 0) != generation or not is_open(view):
+        return
+
+    # Only one idle lint of a view runs at a time
+    if vid in IDLE_LINTS:
+        schedule_idle_lint(linter, view, generation)
+        return
+
+    settings = get_view_settings(view)
+    stand_in = StandInView(view.substr(sublime.Region(0, view.size())), view.file_name(), settings.values(), vid, view.is_dirty())
+    IDLE_LINTS.add(vid)
+    TRACER.instant('idle lint', 'queue', view=vid, linter=linter.language)
+
+    # The linter may run on the main thread while this lint runs
+    thread = threading.Thread(target=idle_lint, args=(linter.copy(), view, generation, stand_in, get_lint_cache(settings)), name='idle linter')
+    thread.setDaemon(True)
+    thread.start()
+
+
+def idle_lint(linter, view, generation, stand_in, cache):
+    '''lints the copy of the text of a huge file in stand_in, in its own thread'''
+    start = time.time()
+    result = None
+
+    try:
+        with TRACER.span('idle lint', 'lint', view=view.id(), linter=linter.language):
+            result = cached_run(cache, linter, stand_in, stand_in.text.encode('utf-8'), (stand_in.file_name() or '').encode('utf-8'))
+    except Exception:
+        traceback.print_exc()
+    finally:
+        invalidate_view_settings(stand_in.id())
+
+    METRICS.record(linter.language, 'idle', (time.time() - start) * 1000)
+    sublime.set_timeout(partial(finish_idle_lint, linter, view, generation, stand_in, result), 0)
+
+
+def finish_idle_lint(linter, view, generation, stand_in, result):
+    vid = view.id()
+    IDLE_LINTS.discard(vid)
+
+    if result is None or not is_open(view):
+        return
+
+    # The view was modified while it was linted: the result is out of date,
+    # and the modification scheduled another idle lint
+    if GENERATIONS.get(vid, 0) != generation:
+        METRICS.count(linter.language, 'preempted')
+        TRACER.instant('idle lint preempted', 'queue', view=vid, linter=linter.language)
+        return
+
+    apply_result(view, linter.language, result, stand_in.size(), len(stand_in.line_starts))
+
+    if get_view_settings(view).get('sublimelinter_notes'):
+        highlight_notes(view, stand_in.text)
 
     update_statusbar(view)
-    end = time.time()
-    TIMES[vid] = (end - start) * 1000  # Keep how long it took to lint
 
-    if kwargs.get('event', None) == 'on_post_save' and view.settings().get('sublimelinter_popup_errors_on_save'):
-        popup_error_list(view)
+
+def iter_errors(vid, stores):
+    '''yields (line, message) of the messages of view vid in stores, by line;
+       the messages are not copied'''
+    messages = [store.get(vid, {}) for store in stores]
+    lines = set()
+
+    for line_messages in messages:
+        lines.update(line_messages)
+
+    for line in sorted(lines):
+        for line_messages in messages:
+            for message in line_messages.get(line, ()):
+                yield line, message
 
 
 def popup_error_list(view):
+    '''shows the messages of view in a quick panel; when there are more than
+       a page, first asks which severities to list'''
     vid = view.id()
-    errors = ERRORS[vid].copy()
+    stores = [store for name, store in SEVERITIES]
+    counts = [(name, store, sum(len(messages) for messages in store.get(vid, {}).itervalues())) for name, store in SEVERITIES]
+    total = sum(count for name, store, count in counts)
 
-    for message_map in [VIOLATIONS[vid], WARNINGS[vid]]:
-        for line, messages in message_map.items():
-            if line in errors:
-                errors[line].extend(messages)
-            else:
-                errors[line] = messages
+    if total <= ERROR_LIST_PAGE_SIZE:
+        show_error_page(view, stores, 0)
+        return
+
+    choices = [stores]
+    items = [[u'All problems', u'{0} problems'.format(total)]]
+
+    for name, store, count in counts:
+        if count:
+            choices.append([store])
+            items.append([u'{0}s'.format(name.capitalize()), u'{0} {1}{2}'.format(count, name, 's' if count != 1 else '')])
+
+    def on_done(selected_item):
+        if selected_item != -1:
+            # A quick panel can't be shown from the callback of another one
+            sublime.set_timeout(partial(show_error_page, view, choices[selected_item], 0), 10)
+
+    view.window().show_quick_panel(items, on_done)
 
-    # Flatten the errors into a list
-    error_list = []
 
-    for line in sorted(errors.keys()):
-        for index, message in enumerate(errors[line]):
-            error_list.append({'line': line, 'message': message})
+def show_error_page(view, stores, start):
+    '''shows a page of the messages of view in stores, from the start-th'''
+    errors = list(itertools.islice(iter_errors(view.id(), stores), start, start + ERROR_LIST_PAGE_SIZE + 1))
+    more = len(errors) > ERROR_LIST_PAGE_SIZE
+    del errors[ERROR_LIST_PAGE_SIZE:]
 
+    # Many messages can be on the same line, get its text once
+    line_texts = {}
     panel_items = []
 
-    for error in error_list:
-        line_text = view.substr(view.full_line(view.text_point(error['line'], 0)))
-        item = [error['message'], u'{0}: {1}'.format(error['line'] + 1, line_text.strip())]
-        panel_items.append(item)
+    for line, message in errors:
+        line_text = line_texts.get(line)
+
+        if line_text is None:
+            line_text = line_texts[line] = view.substr(view.line(view.text_point(line, 0))).strip()
+
+        panel_items.append([message, u'{0}: {1}'.format(line + 1, line_text)])
+
+    if more:
+        panel_items.append([u'More problems...', u'Show the problems after these {0}'.format(start + len(errors))])
 
     def on_done(selected_item):
         if selected_item == -1:
             return
+        elif selected_item == len(errors):
+            sublime.set_timeout(partial(show_error_page, view, stores, start + len(errors)), 10)
+            return
 
         selected = view.sel()
         selected.clear()
 
-        error = error_list[selected_item]
-        region_begin = view.text_point(error['line'], 0)
+        region_begin = view.text_point(errors[selected_item][0], 0)
 
         # Go to the first non-whitespace character of the line
         line_text = view.substr(view.full_line(region_begin))
@@ -216,39 +397,34 @@ def add_lint_marks(view, lines, error_underlines, violation_underlines, warning_
     vid = view.id()
     erase_lint_marks(view)
     types = {'warning': warning_underlines, 'violation': violation_underlines, 'illegal': error_underlines}
+    layers = []
 
     for type_name, underlines in types.items():
         if underlines:
-            view.add_regions('lint-underline-' + type_name, underlines, 'sublimelinter.underline.' + type_name, sublime.DRAW_EMPTY_AS_OVERWRITE)
+            layers.append(MarkLayer('lint-underline-' + type_name, underlines, False, 'sublimelinter.underline.' + type_name, sublime.DRAW_EMPTY_AS_OVERWRITE))
 
     if lines:
-        outline_style = view.settings().get('sublimelinter_mark_style', 'outline')
+        settings = get_view_settings(view)
+        outline_style = settings.get('sublimelinter_mark_style', 'outline')
 
         # This test is for the legacy "fill" setting; it will be removed
         # in a future version (likely v1.7).
-        if view.settings().get('sublimelinter_fill_outlines', False):
+        if settings.get('sublimelinter_fill_outlines', False):
             outline_style = 'fill'
 
-        gutter_mark_enabled = True if view.settings().get('sublimelinter_gutter_marks', False) else False
-
-        gutter_mark_theme = view.settings().get('sublimelinter_gutter_marks_theme', 'simple')
-
-        outlines = {'warning': [], 'violation': [], 'illegal': []}
+        gutter_mark_enabled = True if settings.get('sublimelinter_gutter_marks', False) else False
 
-        for line in ERRORS[vid]:
-            outlines['illegal'].append(view.full_line(view.text_point(line, 0)))
+        gutter_mark_theme = settings.get('sublimelinter_gutter_marks_theme', 'simple')
 
-        for line in WARNINGS[vid]:
-            outlines['warning'].append(view.full_line(view.text_point(line, 0)))
-
-        for line in VIOLATIONS[vid]:
-            outlines['violation'].append(view.full_line(view.text_point(line, 0)))
+        # Outlines are line numbers until they are painted
+        outlines = {'warning': WARNINGS[vid].keys(), 'violation': VIOLATIONS[vid].keys(), 'illegal': ERRORS[vid].keys()}
 
         for lint_type in outlines:
             if outlines[lint_type]:
                 args = [
                     'lint-outlines-{0}'.format(lint_type),
                     outlines[lint_type],
+                    True,
                     'sublimelinter.outline.{0}'.format(lint_type)
                 ]
 
@@ -270,11 +446,32 @@ def add_lint_marks(view, lines, error_underlines, violation_underlines, warning_
                     pass  # outlines are filled by default
                 else:
                     args.append(sublime.DRAW_OUTLINED)
-                view.add_regions(*args)
+                layers.append(MarkLayer(*args))
+
+    # The visible marks are painted now, the others a batch at a time
+    painter = PAINTERS[vid] = MarkPainter(view, layers)
+    painter.start()
+
+
+def paint_all_marks(view):
+    '''paints the marks of view that are still waiting to be painted'''
+    painter = PAINTERS.get(view.id())
+
+    if painter is not None:
+        painter.finish()
+
+
+def cancel_painter(vid):
+    '''stops painting the marks of the view vid that are not painted yet'''
+    painter = PAINTERS.pop(vid, None)
+
+    if painter is not None:
+        painter.cancel()
 
 
 def erase_lint_marks(view):
     '''erase all "lint" error marks from view'''
+    cancel_painter(view.id())
     view.erase_regions('lint-underline-illegal')
     view.erase_regions('lint-underline-violation')
     view.erase_regions('lint-underline-warning')
@@ -286,6 +483,7 @@ def erase_lint_marks(view):
 
 def get_lint_regions(view, reverse=False, coalesce=False):
     vid = view.id()
+    paint_all_marks(view)
     underlines = UNDERLINES.get(vid, [])[:]
 
     if (coalesce):
@@ -313,15 +511,21 @@ def get_lint_regions(view, reverse=False, coalesce=False):
 
     # If an outline region contains an underline region, use only the underline
     regions = underlines
+    underlines = sorted(underlines, key=lambda x: x.begin())
+    begins = [underline.begin() for underline in underlines]
 
     for outline in outlines:
         contains_underlines = False
+        index = bisect.bisect_left(begins, outline.begin())
 
-        for underline in underlines:
-            if outline.contains(underline):
+        # Only the underlines beginning within the outline may be contained in it
+        while index < len(underlines) and begins[index] <= outline.end():
+            if outline.contains(underlines[index]):
                 contains_underlines = True
                 break
 
+            index += 1
+
         if not contains_underlines:
             regions.append(outline)
 
@@ -344,6 +548,7 @@ def select_lint_region(view, region):
 
 
 def find_underline_within(view, region):
+    paint_all_marks(view)
     underlines = view.get_regions('lint-underline-illegal')
     underlines.extend(view.get_regions('lint-underline-violation'))
     underlines.extend(view.get_regions('lint-underline-warning'))
@@ -357,7 +562,7 @@ def find_underline_within(view, region):
 
 
 def syntax_name(view):
-    syntax = os.path.basename(view.settings().get('syntax'))
+    syntax = os.path.basename(get_view_settings(view).get('syntax'))
     syntax = os.path.splitext(syntax)[0]
     return syntax
 
@@ -368,7 +573,8 @@ def select_linter(view, ignore_disabled=False):
     lc_syntax = syntax.lower()
     language = None
     linter = None
-    syntaxMap = view.settings().get('sublimelinter_syntax_map', {})
+    settings = get_view_settings(view)
+    syntaxMap = settings.get('sublimelinter_syntax_map', {})
 
     if syntax in syntaxMap:
         language = syntaxMap.get(syntax, '').lower()
@@ -381,7 +587,7 @@ def select_linter(view, ignore_disabled=False):
         if ignore_disabled:
             disabled = []
         else:
-            disabled = view.settings().get('sublimelinter_disable', [])
+            disabled = settings.get('sublimelinter_disable', [])
 
         if language not in disabled:
             linter = LINTERS.get(language)
@@ -400,36 +606,73 @@ def select_linter(view, ignore_disabled=False):
     return linter
 
 
-def highlight_notes(view):
+def highlight_notes(view, text):
     '''highlight user-specified annotations in a file'''
     view.erase_regions('lint-annotations')
-    text = view.substr(sublime.Region(0, view.size()))
     regions = LINTERS['annotations'].built_in_check(view, text, '')
 
     if regions:
         view.add_regions('lint-annotations', regions, 'sublimelinter.annotations', sublime.DRAW_EMPTY_AS_OVERWRITE)
 
 
+def register_views():
+    '''Registers all views that are currently open.'''
+    for window in sublime.windows():
+        for view in window.views():
+            VIEWS.add(view.id())
+
+
+def is_open(view):
+    '''Returns True if the view has not been closed; views open when the
+       plugin is loaded are registered by BackgroundLinter.'''
+    return view.id() in VIEWS
+
+
+def forget_view(vid):
+    '''Drops everything kept for a closed view.'''
+    VIEWS.discard(vid)
+
+    __lock_.acquire()
+
+    try:
+        QUEUE.pop(vid, None)
+    finally:
+        __lock_.release()
+
+    for store in (ERRORS, VIOLATIONS, WARNINGS, UNDERLINES, STATUS, TIMES, LINT_RESULTS, GENERATIONS):
+        store.pop(vid, None)
+
+    IDLE_LINTS.discard(vid)
+    cancel_painter(vid)
+    invalidate_view_settings(vid)
+    forget_text(vid)
+
+
 def _update_view(view, filename, **kwargs):
     # It is possible that by the time the queue is run,
     # the original file is no longer being displayed in the view,
     # or the view may be gone. This happens especially when
     # viewing files temporarily by single-clicking on a filename
     # in the sidebar or when selecting a file through the choose file palette.
-    valid_view = False
-    view_id = view.id()
+    if not is_open(view) or view.is_loading() or (view.file_name() or '').encode('utf-8') != filename:
+        if kwargs.get('language'):
+            METRICS.count(kwargs['language'], 'cancelled')
+            TRACER.instant('cancelled', 'queue', view=view.id(), linter=kwargs['language'])
 
-    for window in sublime.windows():
-        for v in window.views():
-            if v.id() == view_id:
-                valid_view = True
-                break
-
-    if not valid_view or view.is_loading() or (view.file_name() or '').encode('utf-8') != filename:
         return
 
+    linter = select_linter(view)
+    event = kwargs.get('event', None)
+
     try:
-        run_once(select_linter(view), view, **kwargs)
+        # Huge files are linted a region at a time until they are idle, but
+        # when errors pop up on save, they are listed for the whole file
+        if linter and event in ('on_modified', 'on_load', 'on_post_save') and is_huge_file(linter, view) and \
+                not (event == 'on_post_save' and get_view_settings(view).get('sublimelinter_popup_errors_on_save')):
+            lint_visible_region(linter, view)
+            schedule_idle_lint(linter, view)
+        else:
+            run_once(linter, view, **kwargs)
     except RuntimeError, ex:
         print ex
 
@@ -440,7 +683,7 @@ def queue_linter(linter, view, timeout=-1, preemptive=False, event=None):
         erase_lint_marks(view)  # may have changed file type and left marks behind
 
         # No point in queuing anything if no linters will run
-        if not view.settings().get('sublimelinter_notes'):
+        if not get_view_settings(view).get('sublimelinter_notes'):
             return
 
     if preemptive:
@@ -451,6 +694,14 @@ def queue_linter(linter, view, timeout=-1, preemptive=False, event=None):
         busy_timeout = timeout
 
     kwargs = {'timeout': timeout, 'busy_timeout': busy_timeout, 'preemptive': preemptive, 'event': event}
+
+    if linter is not None:
+        kwargs['language'] = linter.language
+
+        # A lint still waiting in the queue is replaced by this one
+        if view.id() in QUEUE:
+            METRICS.count(linter.language, 'superseded')
+
     queue(view, partial(_update_view, view, (view.file_name() or '').encode('utf-8'), **kwargs), kwargs)
 
 
@@ -490,18 +741,22 @@ def queue_loop():
         __signaled_first_ = 0
         __signaled_ = 0
         #print 'DISPATCHING!', len(QUEUE)
-        queue_dispatcher()
+
+        with TRACER.span('dispatch', 'queue', queued=len(QUEUE)):
+            queue_dispatcher()
 
 
 def queue(view, callback, kwargs):
-    global __signaled_, __signaled_first_
+    global __signaled_, __signaled_first_, __enqueued_
     now = time.time()
     __lock_.acquire()
 
     try:
         QUEUE[view.id()] = callback
+        __enqueued_ = now
         timeout = kwargs['timeout']
         busy_timeout = kwargs['busy_timeout']
+        TRACER.instant('enqueue', 'queue', view=view.id(), linter=kwargs.get('language'), timeout=timeout, busy_timeout=busy_timeout)
 
         if now < __signaled_ + timeout * 4:
             timeout = busy_timeout or timeout
@@ -522,6 +777,7 @@ def _delay_queue(timeout, preemptive):
     now = time.time()
 
     if not preemptive and now <= __queued_ + 0.01:
+        TRACER.instant('delay skipped', 'queue')
         return  # never delay queues too fast (except preemptively)
 
     __queued_ = now
@@ -539,21 +795,50 @@ def _delay_queue(timeout, preemptive):
     if __signaled_ >= now - 0.01 and (preemptive or new__signaled_ >= __signaled_ - 0.01):
         __signaled_ = new__signaled_
         #print 'delayed to', (preemptive, __signaled_ - now)
+        TRACER.instant('delay', 'queue', timeout=timeout, preemptive=preemptive)
+        sublime.set_timeout(partial(_signal, preemptive), timeout)
+
+
+def _signal(preemptive=False):
+    global __deferred_
+    now = time.time()
+
+    if now < __signaled_:
+        TRACER.instant('signal postponed', 'queue')
+        return
+
+    # The cursor is moving: signal once it stops (but not later than MAX_DELAY
+    # after the first signal), there is no point in more than one such signal
+    if not preemptive and now < __moved_ and not (MAX_DELAY > 0 and __signaled_first_ and now - __signaled_first_ > MAX_DELAY):
+        if not __deferred_:
+            __deferred_ = True
+            TRACER.instant('signal deferred', 'queue')
+            sublime.set_timeout(_signal_deferred, int((__moved_ - now) * 1000) + 1)
+
+        return
 
-        def _signal():
-            if time.time() < __signaled_:
-                return
-            __semaphore_.release()
+    TRACER.instant('signal', 'queue')
+    __semaphore_.release()
 
-        sublime.set_timeout(_signal, timeout)
+
+def _signal_deferred():
+    global __deferred_
+    __deferred_ = False
+    _signal()
 
 
 def delay_queue(timeout):
-    __lock_.acquire()
-    try:
-        _delay_queue(timeout, False)
-    finally:
-        __lock_.release()
+    '''Defers pending lints until timeout milliseconds from now. Called on
+       every cursor movement: it only records the time, and takes no lock.'''
+    global __moved_
+    now = time.time()
+
+    # Nothing is pending, or the selection moved with an edit which has just
+    # queued its lint: typing must not defer it
+    if not __signaled_first_ or now <= __enqueued_ + 0.01:
+        return
+
+    __moved_ = now + float(timeout) / 1000
 
 
 # only start the thread once - otherwise the plugin will get laggy
@@ -563,6 +848,9 @@ __lock_ = threading.Lock()
 __queued_ = 0
 __signaled_ = 0
 __signaled_first_ = 0
+__enqueued_ = 0      # time of the last lint queued
+__moved_ = 0         # time until which pending lints are deferred by cursor movement
+__deferred_ = False  # whether a signal deferred by cursor movement is scheduled
 
 # First finalize old standing threads:
 __loop_ = False
@@ -594,6 +882,39 @@ UNRECOGNIZED = '''
 '''
 
 
+def get_annotations_index(window):
+    '''Returns the annotations index of the folders open in window,
+       loading it from disk the first time, or None if there are no folders.'''
+    folders = tuple(sorted(window.folders()))
+
+    if not folders:
+        return None
+
+    index = ANNOTATIONS_INDEXES.get(folders)
+
+    if index is None:
+        digest = hashlib.sha1(u'\n'.join(folders).encode('utf-8')).hexdigest()
+        path = os.path.join(sublime.packages_path(), u'User', u'SublimeLinter', u'annotations-{0}.json'.format(digest))
+        index = ANNOTATIONS_INDEXES[folders] = AnnotationsIndex(path)
+        index.load()
+
+    return index
+
+
+def update_annotations_indexes(view):
+    '''Rescans a saved file in the annotation indexes that contain it.'''
+    filename = view.file_name()
+    linter = LINTERS.get('annotations')
+
+    if not filename or not ANNOTATIONS_INDEXES or linter is None:
+        return
+
+    regex = linter.annotations_regex(view)
+
+    for index in ANNOTATIONS_INDEXES.values():
+        index.update_file(filename, regex)
+
+
 def view_in_tab(view, title, text, file_type):
     '''Helper function to display information in a tab.
     '''
@@ -638,27 +959,15 @@ def reload_view_module(view):
             break
 
 
-def settings_changed():
-    for window in sublime.windows():
-        for view in window.views():
-            linter = select_linter(view)
-
-            if (linter):
-                reload_settings(view)
-
-
 def reload_settings(view):
-    '''Restores user settings.'''
-    settings = sublime.load_settings(__name__ + '.sublime-settings')
-    settings.clear_on_change(__name__)
-    settings.add_on_change(__name__, settings_changed)
+    '''Restores user settings: the values set on the view are dropped, so
+       that those of the package settings apply again.'''
+    settings = view.settings()
 
     for setting in ALL_SETTINGS:
-        if settings.get(setting) != None:
-            view.settings().set(setting, settings.get(setting))
+        settings.erase(setting)
 
-    if view.settings().get('sublimelinter') == None:
-        view.settings().set('sublimelinter', True)
+    invalidate_view_settings(view.id())
 
 
 class LintCommand(sublime_plugin.TextCommand):
@@ -700,21 +1009,25 @@ class LintCommand(sublime_plugin.TextCommand):
     def on(self):
         '''Turns background linting on.'''
         self.view.settings().set('sublimelinter', True)
+        invalidate_view_settings(self.view.id())
         queue_linter(select_linter(self.view), self.view, preemptive=True)
 
     def enable_load_save(self):
         '''Turns load-save linting on.'''
         self.view.settings().set('sublimelinter', 'load-save')
+        invalidate_view_settings(self.view.id())
         erase_lint_marks(self.view)
 
     def enable_save_only(self):
         '''Turns save-only linting on.'''
         self.view.settings().set('sublimelinter', 'save-only')
+        invalidate_view_settings(self.view.id())
         erase_lint_marks(self.view)
 
     def off(self):
         '''Turns background linting off.'''
         self.view.settings().set('sublimelinter', False)
+        invalidate_view_settings(self.view.id())
         erase_lint_marks(self.view)
 
     def _run(self, name):
@@ -731,12 +1044,28 @@ class BackgroundLinter(sublime_plugin.EventListener):
     def __init__(self):
         super(BackgroundLinter, self).__init__()
         self.lastSelectedLineNo = -1
+        register_views()
+
+    def on_new(self, view):
+        VIEWS.add(view.id())
+
+    def on_clone(self, view):
+        VIEWS.add(view.id())
+
+    def on_close(self, view):
+        forget_view(view.id())
 
     def on_modified(self, view):
         if view.is_scratch():
             return
 
-        if view.settings().get('sublimelinter') != True:
+        mark_dirty(view)
+        GENERATIONS[view.id()] = GENERATIONS.get(view.id(), 0) + 1
+
+        # The marks not painted yet are at positions from before the modification
+        cancel_painter(view.id())
+
+        if get_view_settings(view).get('sublimelinter') != True:
             erase_lint_marks(view)
             return
 
@@ -750,12 +1079,12 @@ class BackgroundLinter(sublime_plugin.EventListener):
         # Reset the last selected line number so that the current line will show error messages
         # when update_statusbar is called.
         self.lastSelectedLineNo = -1
-        queue_linter(linter, view)
+        queue_linter(linter, view, event='on_modified')
 
     def on_load(self, view):
-        reload_settings(view)
+        VIEWS.add(view.id())
 
-        sublimelinter_setting = view.settings().get('sublimelinter')
+        sublimelinter_setting = get_view_settings(view).get('sublimelinter')
 
         if view.is_scratch() or sublimelinter_setting == False or sublimelinter_setting == 'save-only':
             return
@@ -763,21 +1092,26 @@ class BackgroundLinter(sublime_plugin.EventListener):
         queue_linter(select_linter(view), view, event='on_load')
 
     def on_post_save(self, view):
-        sublimelinter_setting = view.settings().get('sublimelinter')
-
-        if sublimelinter_setting == None:
-            reload_settings(view)
+        sublimelinter_setting = get_view_settings(view).get('sublimelinter')
 
         if view.is_scratch() or sublimelinter_setting == False:
             return
 
         reload_view_module(view)
         queue_linter(select_linter(view), view, preemptive=True, event='on_post_save')
+        update_annotations_indexes(view)
 
     def on_selection_modified(self, view):
         if view.is_scratch():
             return
         delay_queue(1000)  # on movement, delay queue (to make movement responsive)
+        note_selection(view)  # where the next edit starts, see mark_dirty
+
+        # Marks of large results are still being painted: paint those scrolled to first
+        painter = PAINTERS.get(view.id())
+
+        if painter is not None:
+            painter.paint_visible()
 
         # We only display errors in the status bar for the last line in the current selection.
         # If that line number has not changed, there is no point in updating the status bar.
@@ -827,7 +1161,7 @@ class FindLintErrorCommand(sublime_plugin.TextCommand):
         # If there is only one error line and the cursor is in that line, we cannot move.
         # Otherwise wrap to the first/last error line unless settings disallow that.
         if regionToSelect is None and (len(regions) > 1 or not regions[0].contains(point)):
-            if self.view.settings().get('sublimelinter_wrap_find', True):
+            if get_view_settings(self.view).get('sublimelinter_wrap_find', True):
                 regionToSelect = regions[0]
 
         if regionToSelect is not None:
@@ -889,11 +1223,101 @@ class SublimelinterAnnotationsCommand(SublimelinterWindowCommand):
         if not view:
             return
 
-        text = view.substr(sublime.Region(0, view.size())).encode('utf-8')
-        filename = (view.file_name() or '').encode('utf-8')
+        # Scan the same unicode text as highlight_notes, so that the
+        # annotations found by the last lint are reused
+        text = view.substr(sublime.Region(0, view.size()))
+        filename = view.file_name() or u''
         notes = linter.extract_annotations(text, view, filename)
         _, filename = os.path.split(filename)
-        annotations_view, _id = view_in_tab(view, 'Annotations from {0}'.format(filename), notes, '')
+        annotations_view, _id = view_in_tab(view, u'Annotations from {0}'.format(filename), notes, '')
+
+
+class SublimelinterProjectAnnotationsCommand(SublimelinterWindowCommand):
+    '''Command to list the annotations of all files in the project in a quick panel.
+       The panel shows the last index immediately, the index is then refreshed
+       in the background for files whose mtime changed.'''
+    def is_enabled(self):
+        return bool(self.window.folders()) and LINTERS.get('annotations', None) is not None
+
+    def run_(self, args):
+        linter = LINTERS.get('annotations', None)
+        view = self.window.active_view()
+        index = get_annotations_index(self.window)
+
+        if linter is None or not view or index is None:
+            return
+
+        window = self.window
+        regex = linter.annotations_regex(view)
+        settings = view.settings()
+        file_exclude_patterns = settings.get('file_exclude_patterns', []) + settings.get('binary_file_patterns', [])
+        paths = iter_project_files(window.folders(), settings.get('folder_exclude_patterns', []), file_exclude_patterns)
+
+        if index.pattern == regex.pattern and index.files:
+            self.show_annotations(window, index)
+            index.refresh(paths, regex)
+        else:
+            def on_done(count):
+                sublime.set_timeout(lambda: self.show_annotations(window, index), 0)
+
+            if index.refresh(paths, regex, on_done):
+                sublime.status_message('SublimeLinter: indexing annotations...')
+
+    def show_annotations(self, window, index):
+        results = index.results()
+
+        if not results:
+            sublime.status_message('SublimeLinter: no annotations found')
+            return
+
+        folders = window.folders()
+        items = []
+
+        for filename, row, line in results:
+            relative = filename
+
+            for folder in folders:
+                if filename.startswith(folder + os.sep):
+                    relative = os.path.relpath(filename, folder)
+                    break
+
+            items.append([line, u'{0}:{1}'.format(relative, row + 1)])
+
+        def on_select(selected):
+            if selected != -1:
+                filename, row, line = results[selected]
+                window.open_file(u'{0}:{1}'.format(filename, row + 1), sublime.ENCODED_POSITION)
+
+        window.show_quick_panel(items, on_select)
+
+
+class SublimelinterMetricsCommand(SublimelinterWindowCommand):
+    '''Command to display the lint timings and counters in a tab'''
+    def run_(self, args):
+        view = self.window.active_view()
+
+        if view:
+            view_in_tab(view, u'SublimeLinter Metrics', METRICS.report(), '')
+
+
+class SublimelinterSaveTraceCommand(SublimelinterWindowCommand):
+    '''Command to save the recorded trace events to a file that can be loaded
+       in chrome://tracing, when the sublimelinter_trace setting is true'''
+    def is_enabled(self):
+        return TRACER.enabled
+
+    def run_(self, args):
+        filename = u'trace-{0}.json'.format(time.strftime('%Y%m%d-%H%M%S'))
+        path = os.path.join(sublime.packages_path(), u'User', u'SublimeLinter', filename)
+
+        try:
+            count = TRACER.save(path)
+        except (IOError, OSError), e:
+            sublime.error_message(u'SublimeLinter: could not save the trace: {0}'.format(e))
+            return
+
+        print u'SublimeLinter: saved {0} trace events to {1}'.format(count, path)
+        sublime.status_message(u'SublimeLinter: trace saved to {0}'.format(path))
 
 
 class SublimelinterCommand(SublimelinterWindowCommand):
@@ -942,7 +1366,7 @@ class SublimelinterLintCommand(SublimelinterCommand):
         if enabled:
             view = self.window.active_view()
 
-            if view and view.settings().get('sublimelinter') == True:
+            if view and get_view_settings(view).get('sublimelinter') == True:
                 return False
 
         return enabled
@@ -960,7 +1384,7 @@ class SublimelinterEnableLoadSaveCommand(SublimelinterCommand):
         if enabled:
             view = self.window.active_view()
 
-            if view and view.settings().get('sublimelinter') == 'load-save':
+            if view and get_view_settings(view).get('sublimelinter') == 'load-save':
                 return False
 
         return enabled
@@ -973,7 +1397,7 @@ class SublimelinterEnableSaveOnlyCommand(SublimelinterCommand):
         if enabled:
             view = self.window.active_view()
 
-            if view and view.settings().get('sublimelinter') == 'save-only':
+            if view and get_view_settings(view).get('sublimelinter') == 'save-only':
                 return False
 
         return enabled
@@ -986,7 +1410,7 @@ class SublimelinterDisableCommand(SublimelinterCommand):
         if enabled:
             view = self.window.active_view()
 
-            if view and view.settings().get('sublimelinter') == False:
+            if view and get_view_settings(view).get('sublimelinter') == False:
                 return False
 
         return enabled
@@ -0,0 +1,135 @@
+'''corpus.py
+
+Generates the benchmark corpus: a small, a large and a pathological file
+for each language with a built in linter. The files are generated rather than
+stored, always the same for a given name, so that timings stay comparable.
+'''
+
+PYTHON_FUNCTION = u'''
+def function_{0}(argument, other=None):
+    """Returns something computed from argument."""
+    result = []
+
+    for index in range(argument):
+        if index % 3 == 0:
+            result.append(index * {0})
+        elif other is not None:
+            result.append(other)
+
+    return result
+
+'''
+
+PYTHON_VIOLATIONS = u'''
+def  violations_{0}( a,b ):
+    x=a+b ; y = undefined_{0}
+    import os
+    if x==y : return {{ 'key' : x }}
+    l = lambda:0
+    return unused_{0}
+'''
+
+OBJJ_METHOD = u'''
+- (void)method{0}:(id)anObject
+{{
+    var count = [anObject count],
+        index = 0;
+
+    for (; index < count; ++index)
+    {{
+        var item = [anObject objectAtIndex:index];
+
+        if (item === nil)
+            continue;
+
+        [self addItem:item];
+    }}
+}}
+'''
+
+OBJJ_VIOLATIONS = u'''
+- (void) method{0}:(id) anObject {{
+\tvar a=1;
+    var b =2,c = 3
+    if(a==b){{ return; }}
+    for(var i=0;i<10;i++) {{ [self foo:i] }}
+}}
+'''
+
+NOTES_LINE = u'# {0} TODO: revisit this, README first, FIXME {0} and FIX the rest\n'
+
+
+def python_small():
+    return u'import os\n' + u''.join(PYTHON_FUNCTION.format(i) for i in range(5)) + PYTHON_VIOLATIONS.format(0)
+
+
+def python_large():
+    parts = [u'import os\nimport sys\n']
+
+    for i in range(500):
+        parts.append(PYTHON_FUNCTION.format(i))
+
+        if i % 10 == 0:
+            parts.append(PYTHON_VIOLATIONS.format(i))
+
+    return u''.join(parts)
+
+
+def python_pathological():
+    # A problem on every line, and very long lines
+    parts = [PYTHON_VIOLATIONS.format(i) for i in range(400)]
+    parts.append(u'x = [' + u', '.join(u'name_{0}'.format(i) for i in range(3000)) + u']\n')
+    parts.append(u's = "' + u'a' * 50000 + u'"\n')
+    return u''.join(parts)
+
+
+def objj_small():
+    return u'@implementation Small : CPObject\n{\n    CPArray items;\n}\n' + u''.join(OBJJ_METHOD.format(i) for i in range(5)) + u'\n@end\n'
+
+
+def objj_large():
+    parts = [u'@implementation Large : CPObject\n{\n    CPArray items;\n}\n']
+
+    for i in range(400):
+        parts.append(OBJJ_METHOD.format(i))
+
+        if i % 10 == 0:
+            parts.append(OBJJ_VIOLATIONS.format(i))
+
+    parts.append(u'\n@end\n')
+    return u''.join(parts)
+
+
+def objj_pathological():
+    # Problems on every line, and a var block with thousands of declarations
+    parts = [u'@implementation Pathological : CPObject\n']
+    parts.extend(OBJJ_VIOLATIONS.format(i) for i in range(300))
+    parts.append(u'- (void)vars\n{\n    var ' + u',\n        '.join(u'v{0} = {0}'.format(i) for i in range(3000)) + u';\n}\n')
+    parts.append(u'@end\n')
+    return u''.join(parts)
+
+
+def notes_small():
+    return u''.join(NOTES_LINE.format(i) for i in range(20))
+
+
+def notes_large():
+    return u''.join(NOTES_LINE.format(i) if i % 5 == 0 else u'x = {0}\n'.format(i) for i in range(20000))
+
+
+def notes_pathological():
+    return u'TODO' * 50000 + u'\n'
+
+
+# name -> (syntax of the view, generator)
+CORPUS = [
+    ('python-small', 'Packages/Python/Python.tmLanguage', python_small),
+    ('python-large', 'Packages/Python/Python.tmLanguage', python_large),
+    ('python-pathological', 'Packages/Python/Python.tmLanguage', python_pathological),
+    ('objective-j-small', 'Packages/Objective-J/Objective-J.tmLanguage', objj_small),
+    ('objective-j-large', 'Packages/Objective-J/Objective-J.tmLanguage', objj_large),
+    ('objective-j-pathological', 'Packages/Objective-J/Objective-J.tmLanguage', objj_pathological),
+    ('annotations-small', 'Packages/Text/Plain text.tmLanguage', notes_small),
+    ('annotations-large', 'Packages/Text/Plain text.tmLanguage', notes_large),
+    ('annotations-pathological', 'Packages/Text/Plain text.tmLanguage', notes_pathological),
+]
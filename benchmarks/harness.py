@@ -0,0 +1,122 @@
+'''harness.py
+
+Loads SublimeLinter outside of Sublime Text for benchmarking. The sublime
+module is replaced by sublimelinter/sublime_stub.py, and sublime_plugin by
+a module with empty base classes. EditorView adds the region and status bar
+methods of a real view that the plugin uses.
+'''
+
+import os
+import sys
+import threading
+import types
+
+PACKAGE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if PACKAGE_PATH not in sys.path:
+    sys.path.insert(0, PACKAGE_PATH)
+
+import sublimelinter.sublime_stub as sublime
+
+sys.modules.setdefault('sublime', sublime)
+
+
+# Number of lines of an EditorView shown on screen
+VISIBLE_LINES = 60
+
+
+class Selection(list):
+    def clear(self):
+        del self[:]
+
+    def add(self, region):
+        self.append(region)
+
+
+class EditorView(sublime.View):
+    '''a view that keeps regions and status bar text like the editor does'''
+
+    def __init__(self, text, filename=None, settings=None):
+        super(EditorView, self).__init__(text, filename, settings)
+        self.regions = {}
+        self.status = {}
+        self.selection = Selection([sublime.Region(0)])
+
+    def sel(self):
+        return self.selection
+
+    def is_loading(self):
+        return False
+
+    def add_regions(self, key, regions, scope='', icon='', flags=0):
+        self.regions[key] = list(regions)
+
+    def get_regions(self, key):
+        return list(self.regions.get(key, []))
+
+    def erase_regions(self, key):
+        self.regions.pop(key, None)
+
+    def set_status(self, key, value):
+        self.status[key] = value
+
+    def erase_status(self, key):
+        self.status.pop(key, None)
+
+    def run_command(self, name, args=None):
+        pass
+
+    def visible_region(self):
+        # The first screen of the file
+        return sublime.Region(0, self.text_point(VISIBLE_LINES, 0))
+
+    def show(self, x, show_surrounds=True):
+        pass
+
+    def show_at_center(self, x):
+        pass
+
+
+def install_sublime_plugin():
+    plugin = types.ModuleType('sublime_plugin')
+
+    class Plugin(object):
+        def __init__(self, *args):
+            pass
+
+    plugin.EventListener = plugin.TextCommand = plugin.WindowCommand = plugin.ApplicationCommand = Plugin
+    sys.modules.setdefault('sublime_plugin', plugin)
+
+
+def load_settings(name):
+    return sublime.Settings()
+
+
+def load_plugin():
+    '''imports SublimeLinter.py and stops its background linter thread'''
+    install_sublime_plugin()
+    sublime.load_settings = load_settings
+    sublime.packages_path = lambda: os.path.join(PACKAGE_PATH, '.benchmarks')
+
+    cwd = os.getcwd()
+    os.chdir(PACKAGE_PATH)
+
+    try:
+        stdout = sys.stdout
+        sys.stdout = sys.stderr
+
+        try:
+            import SublimeLinter as plugin
+        finally:
+            sys.stdout = stdout
+    finally:
+        os.chdir(cwd)
+
+    setattr(plugin, '__loop_', False)
+    getattr(plugin, '__semaphore_').release()
+
+    for thread in threading.enumerate():
+        if thread.name == plugin.queue_thread_name:
+            thread.join(1)
+
+    return plugin
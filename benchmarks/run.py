@@ -0,0 +1,255 @@
+'''run.py
+
+Benchmarks SublimeLinter outside of Sublime Text (see harness.py):
+
+    python benchmarks/run.py [options] [name filter...]
+
+Each file of the corpus (see corpus.py) is linted in a view, the way the plugin
+does it, and the time spent in each phase is reported:
+
+    run_once          the whole lint cycle, including the phases below
+    check             the linter's built in check or executable
+    parse_errors      turning the linter output into messages and underlines
+    add_lint_marks    adding the regions to the view
+    update_statusbar  showing the messages of the current line
+    highlight_notes   finding the annotations
+    get_lint_regions  collecting the regions, as done by find next/previous error
+
+Times are the median over the repeats, after one warm-up run. allocs is the
+number of objects tracked by the garbage collector that a phase allocated
+and that were still alive when it returned.
+
+Use --save to write the results as a baseline, and --compare to compare with
+a baseline; the exit code is 1 if a phase got slower than the threshold.
+'''
+
+import gc
+import json
+import optparse
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import CORPUS
+from harness import EditorView, PACKAGE_PATH, load_plugin
+
+PHASES = ('run_once', 'check', 'parse_errors', 'add_lint_marks', 'update_statusbar', 'highlight_notes', 'get_lint_regions')
+
+# Phase timings below this many milliseconds are too noisy to be compared
+MIN_COMPARED_MS = 0.5
+
+clock = time.clock if sys.platform == 'win32' else time.time
+
+
+class Recorder(object):
+    '''wraps functions to accumulate the time and allocations of each phase'''
+
+    def __init__(self):
+        self.count_allocations = False
+        self.reset()
+
+    def reset(self):
+        self.times = dict((phase, 0.0) for phase in PHASES)
+        self.allocs = dict((phase, 0) for phase in PHASES)
+
+    def wrap(self, owner, name, phase):
+        original = getattr(owner, name)
+
+        def measured(*args, **kwargs):
+            if self.count_allocations:
+                before = len(gc.get_objects())
+
+            start = clock()
+
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.times[phase] += clock() - start
+
+                if self.count_allocations:
+                    self.allocs[phase] += len(gc.get_objects()) - before
+
+        setattr(owner, name, measured)
+
+
+def load_default_settings():
+    sys.path.insert(0, PACKAGE_PATH)
+    from sublimelinter.headless import SETTINGS_PATH, load_settings
+    settings = load_settings(SETTINGS_PATH)
+    settings.update({
+        'sublimelinter': True,
+        'sublimelinter_notes': False,
+        'sublimelinter_result_cache': False,
+    })
+    return settings
+
+
+def setup(plugin, recorder):
+    for name in ('run_once', 'add_lint_marks', 'update_statusbar', 'highlight_notes', 'get_lint_regions'):
+        recorder.wrap(plugin, name, name)
+
+    wrapped = set()
+
+    def wrap_linter(linter):
+        if linter is not None and id(linter) not in wrapped:
+            wrapped.add(id(linter))
+            recorder.wrap(linter, 'built_in_check', 'check')
+            recorder.wrap(linter, 'executable_check', 'check')
+            recorder.wrap(linter, 'parse_errors', 'parse_errors')
+
+    return wrap_linter
+
+
+def run_case(plugin, recorder, wrap_linter, settings, name, syntax, generate, repeat):
+    text = generate()
+    values = dict(settings, syntax=syntax)
+    notes = plugin.LINTERS['annotations']
+    notes_module = sys.modules[notes.__module__]
+    linter = None
+
+    def iteration():
+        view = EditorView(text, os.path.join(PACKAGE_PATH, name), values)
+        view.selection[:] = [plugin.sublime.Region(len(text) // 2)]
+        notes_module.FOUND_CACHE.clear()
+
+        if linter is not None:
+            plugin.run_once(linter, view)
+            plugin.get_lint_regions(view, coalesce=True)
+        else:
+            plugin.highlight_notes(view, text)
+
+        plugin.forget_view(view.id())
+
+    view = EditorView(text, os.path.join(PACKAGE_PATH, name), values)
+    linter = plugin.select_linter(view)
+    wrap_linter(linter)
+    wrap_linter(notes)
+
+    # Warm up caches, then time the repeats
+    iteration()
+    samples = []
+
+    for i in range(repeat):
+        recorder.reset()
+        iteration()
+        samples.append(dict(recorder.times))
+
+    # Count allocations in a separate run, as counting them is slow
+    recorder.reset()
+    recorder.count_allocations = True
+    gc.disable()
+
+    try:
+        iteration()
+    finally:
+        gc.enable()
+        recorder.count_allocations = False
+
+    results = {}
+
+    for phase in PHASES:
+        times = sorted(sample[phase] * 1000 for sample in samples)
+
+        if times[-1] == 0:
+            continue
+
+        results[phase] = {
+            'median': times[len(times) // 2],
+            'min': times[0],
+            'allocs': recorder.allocs[phase],
+        }
+
+    return {'size': len(text), 'lines': text.count(u'\n') + 1, 'phases': results}
+
+
+def compare(results, baseline, threshold):
+    '''returns the list of (case, phase, change) that got slower than threshold'''
+    regressions = []
+
+    for name, case in results.iteritems():
+        for phase, result in case['phases'].iteritems():
+            before = baseline.get('cases', {}).get(name, {}).get('phases', {}).get(phase)
+
+            if before is None or max(before['median'], result['median']) < MIN_COMPARED_MS:
+                continue
+
+            change = result['median'] / max(before['median'], 1e-9) - 1
+            result['change'] = change
+
+            if change > threshold:
+                regressions.append((name, phase, change))
+
+    return regressions
+
+
+def report(results):
+    print u'{0:<20} {1:>10} {2:>10} {3:>9} {4:>8}'.format('phase', 'median ms', 'min ms', 'allocs', 'change')
+
+    for name, syntax, generate in CORPUS:
+        if name not in results:
+            continue
+
+        case = results[name]
+        print u'{0} ({1} lines, {2} characters)'.format(name, case['lines'], case['size'])
+
+        for phase in PHASES:
+            result = case['phases'].get(phase)
+
+            if result is None:
+                continue
+
+            change = u'{0:+.0%}'.format(result['change']) if 'change' in result else u''
+            print u'  {0:<18} {1:>10.2f} {2:>10.2f} {3:>9} {4:>8}'.format(phase, result['median'], result['min'], result['allocs'], change)
+
+
+def main():
+    parser = optparse.OptionParser(usage='%prog [options] [name filter...]')
+    parser.add_option('-n', '--repeat', type='int', default=5, help='timed runs of each case (default 5)')
+    parser.add_option('--save', metavar='FILE', help='save the results as a baseline')
+    parser.add_option('--compare', metavar='FILE', help='compare the results with a baseline')
+    parser.add_option('--threshold', type='float', default=0.25,
+                      help='slowdown reported as a regression when comparing, 0.25 is 25%% (the default)')
+    options, filters = parser.parse_args()
+
+    plugin = load_plugin()
+    recorder = Recorder()
+    wrap_linter = setup(plugin, recorder)
+    settings = load_default_settings()
+    results = {}
+
+    # Linters print diagnostics, keep them apart from the report
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+
+    try:
+        for name, syntax, generate in CORPUS:
+            if filters and not [f for f in filters if f in name]:
+                continue
+
+            results[name] = run_case(plugin, recorder, wrap_linter, settings, name, syntax, generate, options.repeat)
+    finally:
+        sys.stdout = stdout
+
+    regressions = []
+
+    if options.compare:
+        with open(options.compare, 'rb') as f:
+            regressions = compare(results, json.load(f), options.threshold)
+
+    report(results)
+
+    if options.save:
+        with open(options.save, 'wb') as f:
+            json.dump({'python': platform.python_version(), 'platform': platform.platform(), 'cases': results}, f, indent=2, sort_keys=True)
+
+    for name, phase, change in regressions:
+        print u'regression: {0} {1} is {2:.0%} slower'.format(name, phase, change)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import sys
+
+from sublimelinter.headless import main
+
+sys.exit(main())
@@ -0,0 +1,243 @@
+'''annotations_index.py
+
+A project-wide index of annotations (TODO, FIXME, etc.). Files are scanned
+by a pool of threads, rescanned only when their mtime changes, and the index
+is persisted to disk so that it is available immediately after a restart.
+
+This module does not use the sublime API, so it is safe to call from any thread.
+'''
+
+import fnmatch
+import json
+import os
+import os.path
+import Queue
+import threading
+
+INDEX_VERSION = 1
+
+# Number of threads scanning files
+POOL_SIZE = 4
+
+# Files larger than this are not scanned, in bytes
+MAX_FILE_SIZE = 1024 * 1024
+
+# Annotation lines are truncated to this many characters
+MAX_LINE_LENGTH = 200
+
+
+def scan_text(text, regex):
+    '''returns [row, line] for each line of text with an annotation'''
+    notes = []
+    row = 0
+    last = 0
+    last_row = -1
+
+    for match in regex.finditer(text):
+        start = match.start()
+        row += text.count(u'\n', last, start)
+        last = start
+
+        if row == last_row:
+            continue
+
+        last_row = row
+        begin = text.rfind(u'\n', 0, start) + 1
+        end = text.find(u'\n', start)
+
+        if end == -1:
+            end = len(text)
+
+        notes.append([row, text[begin:end].strip()[:MAX_LINE_LENGTH]])
+
+    return notes
+
+
+def scan_file(path, regex):
+    '''returns the annotations of a file, or [] if it can't be read or is binary'''
+    try:
+        if os.path.getsize(path) > MAX_FILE_SIZE:
+            return []
+
+        with open(path, 'rb') as f:
+            data = f.read()
+    except (IOError, OSError):
+        return []
+
+    if '\0' in data:
+        return []
+
+    return scan_text(data.decode('utf-8', 'replace'), regex)
+
+
+def matches_any(name, patterns):
+    for pattern in patterns:
+        if fnmatch.fnmatch(name, pattern):
+            return True
+
+    return False
+
+
+def iter_project_files(folders, folder_exclude_patterns=(), file_exclude_patterns=()):
+    '''yields the path of every file in folders, skipping excluded folders and files'''
+    for folder in folders:
+        for dirpath, dirnames, filenames in os.walk(folder):
+            dirnames[:] = [name for name in dirnames if not matches_any(name, folder_exclude_patterns)]
+
+            for name in filenames:
+                if not matches_any(name, file_exclude_patterns):
+                    yield os.path.join(dirpath, name)
+
+
+class AnnotationsIndex(object):
+    '''annotations of all files in a set of folders, keyed by file name'''
+
+    def __init__(self, path):
+        self.path = path
+        self.pattern = None
+        self.files = {}  # file name -> (mtime, [[row, line], ...])
+        self.lock = threading.Lock()
+        self.refreshing = False
+
+    def load(self):
+        '''reads the persisted index, if any'''
+        try:
+            with open(self.path, 'rb') as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return
+
+        if data.get('version') != INDEX_VERSION:
+            return
+
+        with self.lock:
+            self.pattern = data.get('pattern')
+            self.files = dict((name, tuple(entry)) for name, entry in data.get('files', {}).iteritems())
+
+    def save(self):
+        with self.lock:
+            data = {'version': INDEX_VERSION, 'pattern': self.pattern, 'files': self.files}
+            text = json.dumps(data)
+
+        directory = os.path.dirname(self.path)
+
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+
+            temp = self.path + '.tmp'
+
+            with open(temp, 'wb') as f:
+                f.write(text)
+
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+            os.rename(temp, self.path)
+        except (IOError, OSError) as e:
+            print u'SublimeLinter: could not save the annotations index: {0}'.format(e)
+
+    def results(self):
+        '''returns (file name, row, line) for every annotation, sorted by file and row'''
+        with self.lock:
+            items = [(name, entry[1]) for name, entry in self.files.iteritems() if entry[1]]
+
+        results = []
+
+        for name, notes in sorted(items):
+            results.extend((name, row, line) for row, line in notes)
+
+        return results
+
+    def update_file(self, path, regex):
+        '''rescans a single file if it is part of the index'''
+        with self.lock:
+            if path not in self.files or self.pattern != regex.pattern:
+                return
+
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return
+
+        notes = scan_file(path, regex)
+
+        with self.lock:
+            self.files[path] = (mtime, notes)
+
+    def refresh(self, paths, regex, on_done=None):
+        '''rescans the files whose mtime changed in a background thread pool;
+           paths may be a generator, it is consumed in the background.
+           on_done is called with the number of rescanned files when finished.
+           Returns False if a refresh is already running.'''
+        with self.lock:
+            if self.refreshing:
+                return False
+
+            self.refreshing = True
+
+        thread = threading.Thread(target=self._refresh, args=(paths, regex, on_done))
+        thread.daemon = True
+        thread.start()
+        return True
+
+    def _refresh(self, paths, regex, on_done):
+        count = 0
+
+        try:
+            with self.lock:
+                if self.pattern != regex.pattern:
+                    self.pattern = regex.pattern
+                    self.files = {}
+
+                known = self.files
+
+            stale = Queue.Queue()
+            files = {}
+
+            for path in paths:
+                try:
+                    mtime = os.path.getmtime(path)
+                except OSError:
+                    continue
+
+                entry = known.get(path)
+
+                if entry is not None and entry[0] == mtime:
+                    files[path] = entry
+                else:
+                    stale.put((path, mtime))
+
+            count = stale.qsize()
+            workers = []
+
+            for i in range(min(POOL_SIZE, count)):
+                worker = threading.Thread(target=self._scan_worker, args=(stale, regex, files))
+                worker.daemon = True
+                worker.start()
+                workers.append(worker)
+
+            for worker in workers:
+                worker.join()
+
+            # Files that no longer exist are dropped
+            with self.lock:
+                self.files = files
+
+            if count or len(files) != len(known):
+                self.save()
+        finally:
+            with self.lock:
+                self.refreshing = False
+
+        if on_done is not None:
+            on_done(count)
+
+    def _scan_worker(self, stale, regex, files):
+        while True:
+            try:
+                path, mtime = stale.get_nowait()
+            except Queue.Empty:
+                return
+
+            files[path] = (mtime, scan_file(path, regex))
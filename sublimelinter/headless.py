@@ -0,0 +1,404 @@
+'''headless.py
+
+Runs the linter modules outside of Sublime Text, for continuous integration
+and pre-commit hooks. From the SublimeLinter package directory (or with it
+on PYTHONPATH):
+
+    python -m sublimelinter [options] path...
+
+Directories are searched for files with a known extension. Files are linted
+in parallel, and problems are written to stdout as JSON lines or as a SARIF
+log. Linter and progress messages go to stderr.
+
+Exit codes:
+    0   no problems at or above the --fail-on severity
+    1   problems at or above the --fail-on severity were found
+    2   bad arguments, or some files could not be linted
+'''
+
+import fnmatch
+import itertools
+import json
+import multiprocessing
+import optparse
+import os
+import os.path
+import re
+import sys
+import time
+import traceback
+import urllib
+import urlparse
+
+import sublime_stub
+
+# The linter modules import sublime, so the stub must be in place before they are loaded
+sys.modules.setdefault('sublime', sublime_stub)
+
+from lint_cache import LintCache, cached_run
+from loader import LazyLinters, Loader
+from modules.base_linter import invalidate_view_settings
+
+SETTINGS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'SublimeLinter.sublime-settings')
+
+# Matches JSON strings, so they can be kept, and comments, so they can be removed
+JSON_COMMENTS_RE = re.compile(r'("(?:\\.|[^"\\])*")|/\*[\s\S]*?\*/|//[^\n]*')
+
+# File extension -> language of the linter used for it
+EXTENSIONS = {
+    '.c': 'c',
+    '.cc': 'c',
+    '.coffee': 'coffeescript',
+    '.cpp': 'c',
+    '.css': 'css',
+    '.go': 'go',
+    '.h': 'c',
+    '.haml': 'ruby haml',
+    '.hs': 'haskell',
+    '.htm': 'html',
+    '.html': 'html',
+    '.j': 'objective-j',
+    '.java': 'java',
+    '.js': 'javascript',
+    '.lua': 'lua',
+    '.php': 'php',
+    '.pl': 'perl',
+    '.pm': 'perl',
+    '.pp': 'puppet',
+    '.py': 'python',
+    '.pyw': 'python',
+    '.rb': 'ruby',
+    '.xml': 'xml',
+}
+
+# Folders that are never searched
+DEFAULT_EXCLUDES = ['.bzr', '.git', '.hg', '.svn', 'CVS', '_darcs']
+
+# Severities, from the most to the least severe
+SEVERITIES = ('error', 'violation', 'warning')
+
+# How SARIF levels map to severities
+SARIF_LEVELS = {'error': 'error', 'violation': 'warning', 'warning': 'note'}
+
+# Per process state, set up by init_worker
+SETTINGS = {}
+LINTERS = None
+CACHE = None
+
+
+def load_settings(path):
+    '''reads a .sublime-settings file, which is JSON with comments'''
+    with open(path, 'rb') as f:
+        text = f.read().decode('utf-8')
+
+    return json.loads(JSON_COMMENTS_RE.sub(lambda match: match.group(1) or '', text))
+
+
+def language_for(path):
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def matches_any(name, patterns):
+    for pattern in patterns:
+        if fnmatch.fnmatch(name, pattern):
+            return True
+
+    return False
+
+
+def iter_source_files(paths, excludes=()):
+    '''yields the files to lint in paths: files given explicitly, and the files
+       with a known extension in the directories, like pyflakes.api.iterSourceCode'''
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames[:] = sorted(name for name in dirnames if not matches_any(name, excludes))
+
+                for filename in sorted(filenames):
+                    if language_for(filename) and not matches_any(filename, excludes):
+                        yield os.path.join(dirpath, filename)
+        else:
+            yield path
+
+
+def init_worker(settings, cache_path=None):
+    '''loads the linters in a worker process'''
+    global LINTERS, CACHE
+
+    # The linters print diagnostics, keep them out of the results
+    sys.stdout = sys.stderr
+    SETTINGS.update(settings)
+    LINTERS = LazyLinters()
+    Loader(os.getcwdu(), LINTERS)
+
+    if settings.get('sublimelinter_result_cache', True):
+        CACHE = LintCache(cache_path, settings.get('sublimelinter_result_cache_size', 64) * 1024 * 1024)
+
+
+def select_linter(language, view):
+    '''returns the linter for language, checking that it can run the first time'''
+    if language in SETTINGS.get('sublimelinter_disable', []):
+        return None
+
+    linter = LINTERS.get(language)
+
+    if linter is not None and not linter.enabled:
+        enabled, message = linter.check_enabled(view)
+        print 'SublimeLinter: {0} {1} ({2})'.format(language, 'enabled' if enabled else 'disabled', message)
+
+        if not enabled:
+            del LINTERS[language]
+            linter = None
+
+    return linter
+
+
+def underline_columns(view, underlines):
+    '''returns the columns of the underlines of each row, in the order they
+       were added; linters underline a range one character at a time, so the
+       characters that follow each other make up one underline'''
+    columns = {}
+    end = None
+
+    for region in underlines:
+        if region.begin() != end:
+            row, col = view.rowcol(region.begin())
+            columns.setdefault(row, []).append(col)
+
+        end = max(region.end(), region.begin() + 1)
+
+    return columns
+
+
+def message_columns(messages, columns):
+    '''returns the column of each message of a row: linters add the underlines
+       of a row in the order of its messages, so they can be paired when there
+       is one underline per message; otherwise the column is not known (None)'''
+    if len(columns) == len(messages):
+        return columns
+
+    if len(messages) == 1 and columns:
+        # A word may be underlined wherever it occurs in the row
+        return columns[:1]
+
+    return [None] * len(messages)
+
+
+def lint_file(path):
+    '''lints a file, returns a dict with its problems, or why it was skipped or failed'''
+    result = {'path': path, 'problems': []}
+    language = language_for(path)
+
+    if language is None:
+        result['skipped'] = 'no linter for this file type'
+        return result
+
+    view = None
+
+    try:
+        with open(path, 'rb') as f:
+            code = f.read()
+
+        text = code.decode('utf-8', 'replace')
+        filename = os.path.abspath(path)
+        view = sublime_stub.View(text, filename.decode(sys.getfilesystemencoding() or 'utf-8', 'replace'), SETTINGS)
+        linter = select_linter(language, view)
+
+        if linter is None:
+            result['skipped'] = '{0} linter is disabled'.format(language)
+            return result
+
+        lines, error_underlines, violation_underlines, warning_underlines, errors, violations, warnings = \
+            cached_run(CACHE, linter, view, text.encode('utf-8'), filename)
+    except Exception:
+        result['failed'] = traceback.format_exc()
+        return result
+    finally:
+        if view is not None:
+            invalidate_view_settings(view.id())
+
+    problems = result['problems']
+
+    for severity, messages, underlines in zip(SEVERITIES, (errors, violations, warnings), (error_underlines, violation_underlines, warning_underlines)):
+        columns = underline_columns(view, underlines)
+
+        for row, row_messages in messages.iteritems():
+            for message, col in zip(row_messages, message_columns(row_messages, columns.get(row, []))):
+                problem = {
+                    'path': path,
+                    'line': row + 1,
+                    'severity': severity,
+                    'linter': linter.language,
+                    'message': message,
+                }
+
+                if col is not None:
+                    problem['column'] = col + 1
+
+                problems.append(problem)
+
+    problems.sort(key=lambda problem: (problem['line'], SEVERITIES.index(problem['severity'])))
+    return result
+
+
+def file_uri(path):
+    '''returns the file:// URI of an absolute path'''
+    return urlparse.urljoin('file:', urllib.pathname2url(path))
+
+
+def artifact_location(path, root):
+    '''returns the SARIF location of path: relative to the source root if it
+       is under root, otherwise an absolute file:// URI'''
+    path = os.path.abspath(path)
+
+    try:
+        relative = os.path.relpath(path, root)
+    except ValueError:
+        # On another drive
+        relative = os.pardir
+
+    if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+        return {'uri': file_uri(path)}
+
+    return {'uri': urllib.quote(relative.replace(os.sep, '/')), 'uriBaseId': '%SRCROOT%'}
+
+
+def sarif_log(problems, root):
+    '''returns a SARIF 2.1.0 log of the problems, with the paths under root
+       relative to it'''
+    results = []
+
+    for problem in problems:
+        region = {'startLine': problem['line']}
+
+        if 'column' in problem:
+            region['startColumn'] = problem['column']
+
+        results.append({
+            'ruleId': problem['linter'],
+            'level': SARIF_LEVELS[problem['severity']],
+            'message': {'text': problem['message']},
+            'locations': [{
+                'physicalLocation': {
+                    'artifactLocation': artifact_location(problem['path'], root),
+                    'region': region,
+                },
+            }],
+        })
+
+    return {
+        'version': '2.1.0',
+        '$schema': 'https://json.schemastore.org/sarif-2.1.0.json',
+        'runs': [{
+            'tool': {'driver': {'name': 'SublimeLinter', 'informationUri': 'https://github.com/SublimeLinter/SublimeLinter'}},
+            'originalUriBaseIds': {'%SRCROOT%': {'uri': file_uri(os.path.join(root, ''))}},
+            'results': results,
+        }],
+    }
+
+
+def parse_args(args):
+    parser = optparse.OptionParser(prog='python -m sublimelinter', usage='%prog [options] path...')
+    parser.add_option('-f', '--format', choices=('jsonl', 'sarif'), default='jsonl',
+                      help='output format: jsonl (one problem per line, the default) or sarif')
+    parser.add_option('-j', '--jobs', type='int', default=0,
+                      help='number of processes linting files, defaults to the number of CPUs')
+    parser.add_option('-s', '--settings', action='append', default=[], metavar='FILE',
+                      help='a .sublime-settings file applied over the default settings, may be repeated')
+    parser.add_option('-x', '--exclude', action='append', default=[], metavar='PATTERN',
+                      help='file or folder name pattern to skip, may be repeated')
+    parser.add_option('--cache', metavar='PATH',
+                      help='the lint result cache database, shared with the editor by default')
+    parser.add_option('--no-cache', action='store_true', default=False,
+                      help='lint every file, without reading or writing the lint result cache')
+    parser.add_option('--fail-on', choices=SEVERITIES + ('never',), default='warning',
+                      help='lowest severity that makes the exit code 1: error, violation, warning (the default) or never')
+    options, paths = parser.parse_args(args)
+
+    if not paths:
+        parser.error('no paths given')
+
+    return options, paths
+
+
+def main(args=None):
+    options, paths = parse_args(sys.argv[1:] if args is None else args)
+    output = sys.stdout
+    start = time.time()
+
+    try:
+        settings = load_settings(SETTINGS_PATH)
+
+        for path in options.settings:
+            settings.update(load_settings(path))
+    except (IOError, OSError, ValueError) as e:
+        print >> sys.stderr, 'SublimeLinter: could not read settings: {0}'.format(e)
+        return 2
+
+    if options.no_cache:
+        settings['sublimelinter_result_cache'] = False
+
+    jobs = options.jobs or multiprocessing.cpu_count()
+    files = iter_source_files(paths, DEFAULT_EXCLUDES + options.exclude)
+    pool = None
+
+    if jobs > 1:
+        pool = multiprocessing.Pool(jobs, init_worker, (settings, options.cache))
+        results = pool.imap(lint_file, files, chunksize=8)
+    else:
+        init_worker(settings, options.cache)
+        results = itertools.imap(lint_file, files)
+
+    if options.fail_on == 'never':
+        gating = ()
+    else:
+        gating = SEVERITIES[:SEVERITIES.index(options.fail_on) + 1]
+
+    problems = []
+    counts = dict((severity, 0) for severity in SEVERITIES)
+    linted = skipped = failed = 0
+
+    sys.stdout = sys.stderr
+
+    try:
+        for result in results:
+            if 'failed' in result:
+                failed += 1
+                print >> sys.stderr, 'SublimeLinter: could not lint {0}:\n{1}'.format(result['path'], result['failed'])
+                continue
+            elif 'skipped' in result:
+                skipped += 1
+                print >> sys.stderr, 'SublimeLinter: skipped {0}: {1}'.format(result['path'], result['skipped'])
+                continue
+
+            linted += 1
+
+            for problem in result['problems']:
+                counts[problem['severity']] += 1
+
+                if options.format == 'jsonl':
+                    output.write(json.dumps(problem) + '\n')
+                else:
+                    problems.append(problem)
+    finally:
+        sys.stdout = output
+
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    if options.format == 'sarif':
+        json.dump(sarif_log(problems, os.getcwd()), output, indent=2)
+        output.write('\n')
+
+    output.flush()
+    print >> sys.stderr, 'SublimeLinter: {0} errors, {1} violations, {2} warnings in {3} files ({4} skipped, {5} failed) in {6:.1f} s'.format(
+        counts['error'], counts['violation'], counts['warning'], linted, skipped, failed, time.time() - start)
+
+    if failed:
+        return 2
+
+    if [severity for severity in gating if counts[severity]]:
+        return 1
+
+    return 0
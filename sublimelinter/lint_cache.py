@@ -0,0 +1,246 @@
+'''lint_cache.py
+
+A persistent cache of lint results, shared by the editor and the command line.
+
+Results are stored in an SQLite database in the user's cache directory, keyed
+by the linter, its fingerprint (module and executable versions), the settings
+fingerprint, the file name and the hash of the linted text. When the database
+grows above its size limit, the least recently used results are evicted.
+
+If the sqlite3 module is not available (it is missing from some builds of
+Sublime Text's embedded Python), results are simply not cached.
+'''
+
+import hashlib
+import json
+import os
+import os.path
+import sys
+import threading
+import time
+import zlib
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+import sublime
+
+from metrics import METRICS
+from modules.base_linter import get_view_settings
+
+# Default size limit of the cache, in bytes
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+# When the size limit is exceeded, results are evicted down to this fraction of it
+EVICT_TO = 0.75
+
+# Last use times of cache hits are written in batches of this size, so that a
+# hit doesn't cost a write
+TOUCH_BATCH_SIZE = 32
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS results (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        used REAL NOT NULL
+    )
+'''
+
+
+def default_cache_path():
+    '''returns the path of the cache database in the user's cache directory'''
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser(u'~')
+    elif sys.platform == 'darwin':
+        base = os.path.join(os.path.expanduser(u'~'), u'Library', u'Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser(u'~'), u'.cache')
+
+    return os.path.join(base, u'SublimeLinter', u'results.sqlite')
+
+
+def result_key(linter, view, code, filename):
+    '''returns the cache key of linting code with linter, or None if
+       the result of this linter can't be cached for this view'''
+    if not linter.is_cacheable(view):
+        return None
+
+    parts = [
+        linter.language,
+        linter.get_fingerprint(),
+        get_view_settings(view).fingerprint,
+        filename or '',
+        hashlib.sha1(code).hexdigest(),
+    ]
+    return hashlib.sha1('\0'.join(part.encode('utf-8') if isinstance(part, unicode) else part for part in parts)).hexdigest()
+
+
+def encode_result(result):
+    lines, error_underlines, violation_underlines, warning_underlines, errors, violations, warnings = result
+    underlines = [[[region.begin(), region.end()] for region in regions] for regions in (error_underlines, violation_underlines, warning_underlines)]
+    messages = [sorted(messages.iteritems()) for messages in (errors, violations, warnings)]
+    return zlib.compress(json.dumps([sorted(lines), underlines, messages]))
+
+
+def decode_result(value):
+    lines, underlines, messages = json.loads(zlib.decompress(str(value)))
+    result = [set(lines)]
+    result.extend([sublime.Region(begin, end) for begin, end in regions] for regions in underlines)
+    result.extend(dict((row, row_messages) for row, row_messages in pairs) for pairs in messages)
+    return tuple(result)
+
+
+class LintCache(object):
+    '''an SQLite store of lint results with least recently used eviction'''
+
+    def __init__(self, path=None, max_size=DEFAULT_MAX_SIZE):
+        self.path = path or default_cache_path()
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.connection = None
+        self.pid = None
+        self.size = 0
+        self.touched = {}  # key -> last use time, not written yet
+        self.disabled = sqlite3 is None
+
+    def connect(self):
+        '''returns the connection to the database, opening it the first time
+           in each process; returns None if the cache can't be used'''
+        if self.disabled:
+            return None
+
+        if self.connection is not None and self.pid == os.getpid():
+            return self.connection
+
+        try:
+            directory = os.path.dirname(self.path)
+
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+
+            connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            connection.execute(SCHEMA)
+            connection.commit()
+            self.size = connection.execute('SELECT COALESCE(SUM(LENGTH(value)), 0) FROM results').fetchone()[0]
+        except (OSError, sqlite3.Error) as e:
+            print u'SublimeLinter: lint result cache disabled: {0}'.format(e)
+            self.disabled = True
+            return None
+
+        self.connection = connection
+        self.pid = os.getpid()
+        return connection
+
+    def get(self, key):
+        '''returns the result stored for key, or None'''
+        with self.lock:
+            connection = self.connect()
+
+            if connection is None:
+                return None
+
+            try:
+                row = connection.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+
+                if row is None:
+                    return None
+
+                self.touched[key] = time.time()
+
+                if len(self.touched) >= TOUCH_BATCH_SIZE:
+                    self.write_touched(connection)
+                    connection.commit()
+
+                return decode_result(row[0])
+            except (sqlite3.Error, ValueError, zlib.error) as e:
+                print u'SublimeLinter: could not read the lint result cache: {0}'.format(e)
+                return None
+
+    def put(self, key, result):
+        '''stores the result for key, evicting old results if the cache is full'''
+        with self.lock:
+            connection = self.connect()
+
+            if connection is None:
+                return
+
+            try:
+                value = encode_result(result)
+            except ValueError:
+                # Messages that are not valid UTF-8 can't be stored
+                return
+
+            try:
+                self.write_touched(connection)
+                connection.execute('INSERT OR REPLACE INTO results (key, value, used) VALUES (?, ?, ?)',
+                                   (key, sqlite3.Binary(value), time.time()))
+                self.size += len(value)
+
+                if self.size > self.max_size:
+                    self.evict(connection)
+
+                connection.commit()
+            except sqlite3.Error as e:
+                print u'SublimeLinter: could not write the lint result cache: {0}'.format(e)
+
+    def write_touched(self, connection):
+        if self.touched:
+            connection.executemany('UPDATE results SET used = ? WHERE key = ?',
+                                   [(used, key) for key, used in self.touched.iteritems()])
+            self.touched.clear()
+
+    def evict(self, connection):
+        '''deletes the least recently used results until the cache is small enough'''
+        target = self.max_size * EVICT_TO
+        size = connection.execute('SELECT COALESCE(SUM(LENGTH(value)), 0) FROM results').fetchone()[0]
+        cursor = connection.execute('SELECT key, LENGTH(value) FROM results ORDER BY used')
+        evicted = []
+
+        for key, length in cursor:
+            if size <= target:
+                break
+
+            evicted.append((key,))
+            size -= length
+
+        cursor.close()
+        connection.executemany('DELETE FROM results WHERE key = ?', evicted)
+        self.size = size
+
+    def clear(self):
+        with self.lock:
+            connection = self.connect()
+
+            if connection is not None:
+                self.touched.clear()
+                connection.execute('DELETE FROM results')
+                connection.commit()
+                self.size = 0
+
+
+def cached_run(cache, linter, view, code, filename):
+    '''runs linter.run, or returns its result from the cache if the same
+       linter already linted the same code with the same settings; only the
+       results of saved text are stored, not those of each modification'''
+    key = None
+
+    if cache is not None:
+        key = result_key(linter, view, code, filename)
+
+        if key is not None:
+            result = cache.get(key)
+
+            if result is not None:
+                METRICS.count(linter.language, 'cache hits')
+                return result
+
+            METRICS.count(linter.language, 'cache misses')
+
+    result = linter.run(view, code, filename)
+
+    if key is not None and not view.is_dirty():
+        cache.put(key, result)
+
+    return result
@@ -1,13 +1,24 @@
 # Note: Unlike linter modules, changes made to this module will NOT take effect until
 # Sublime Text is restarted.
 
+import ast
 import glob
+import imp
 import os
 import os.path
 import sys
+import time
 
+import modules
 import modules.base_linter as base_linter
 
+MODULES_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__.encode('utf-8')), u'modules'))
+LIBS_PATH = os.path.join(MODULES_PATH, u'libs')
+
+# Resolve linter modules by absolute path, so that importing them does not
+# depend on the current working directory.
+modules.__path__ = [MODULES_PATH]
+
 # sys.path appears to ignore individual paths with unicode characters.
 # This means that this lib_path will be ignored for Windows 7 users with
 # non-ascii characters in their username (thus as their home directory).
@@ -18,17 +29,100 @@ import modules.base_linter as base_linter
 #     sys.path.insert(0, libs_path)
 
 # As a fix for the Windows 7 lib path issue (#181), the individual modules in
-# the `libs` folder can be explicitly imported. This obviously doesn't scale
-# well, but may be a necessary evil until ST2 upgrades its internal Python.
+# the `libs` folder are explicitly imported by their absolute path.
+# This obviously doesn't scale well, but may be a necessary evil until ST2
+# upgrades its internal Python.
 #
-tmpdir = os.getcwdu()
-os.chdir(os.path.abspath(os.path.join(os.path.dirname(__file__.encode('utf-8')), u'modules', u'libs')))
+# The libs are imported the first time a linter module that uses them is loaded.
+LIBS = {
+    'capp_lint': [u'capp_lint'],
+    'pep8': [u'pep8'],
+    'pyflakes': [u'pyflakes', u'pyflakes.api', u'pyflakes.checker', u'pyflakes.messages', u'pyflakes.reporter'],
+}
+
+IMPORTED_LIBS = set()
+
+
+def import_libs(names):
+    '''imports the given libs from the `libs` folder if they are not imported yet'''
+    names = [name for name in names if name not in IMPORTED_LIBS]
+
+    if not names:
+        return
+
+    for name in names:
+        # The top level module or package is found in the libs folder;
+        # submodules of a package are then found through its __path__.
+        if name not in sys.modules:
+            f, pathname, description = imp.find_module(name, [LIBS_PATH])
+
+            try:
+                imp.load_module(name, f, pathname, description)
+            finally:
+                if f:
+                    f.close()
+
+        for mod in LIBS[name]:
+            __import__(mod)
+            print u'imported {0}'.format(mod)
+
+        IMPORTED_LIBS.add(name)
+
+
+def read_manifest(path):
+    '''reads the language and the libs used by a linter module without executing it'''
+    with open(path, 'r') as f:
+        tree = ast.parse(f.read(), path)
+
+    language = ''
+    libs = set()
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Dict):
+            if [target for target in node.targets if isinstance(target, ast.Name) and target.id == 'CONFIG']:
+                for key, value in zip(node.value.keys, node.value.values):
+                    if isinstance(key, ast.Str) and key.s == 'language' and isinstance(value, ast.Str):
+                        language = value.s
+
+        elif isinstance(node, ast.Import):
+            libs.update(alias.name.split('.')[0] for alias in node.names)
+
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            libs.add(node.module.split('.')[0])
+
+    return language, sorted(libs.intersection(LIBS))
+
+
+class LazyLinters(dict):
+    '''mapping of language name to linter which imports a linter module
+       the first time its language is looked up'''
+    def __init__(self):
+        super(LazyLinters, self).__init__()
+        self.loader = None
+        self.manifest = {}  # lowercase language name -> (module name, libs)
+
+    def __missing__(self, language):
+        if language in self.manifest and self.loader is not None:
+            name, libs = self.manifest.pop(language)
+            self.loader.load_module(name, libs)
 
-for mod in [u'capp_lint', u'pep8', u'pyflakes', u'pyflakes.api', u'pyflakes.checker', u'pyflakes.messages', u'pyflakes.reporter']:
-    __import__(mod)
-    print u'imported {0}'.format(mod)
+            if dict.__contains__(self, language):
+                return dict.__getitem__(self, language)
 
-os.chdir(tmpdir)
+        raise KeyError(language)
+
+    def __contains__(self, language):
+        return dict.__contains__(self, language) or language in self.manifest
+
+    def __delitem__(self, language):
+        if self.manifest.pop(language, None) is None or dict.__contains__(self, language):
+            dict.__delitem__(self, language)
+
+    def get(self, language, default=None):
+        try:
+            return self[language]
+        except KeyError:
+            return default
 
 
 class Loader(object):
@@ -40,8 +134,14 @@ class Loader(object):
         self.linters = linters
         self.modpath = self.basepath.replace('/', u'.')
         self.ignored = ('__init__', 'base_linter')
+        self.timings = {}  # module name -> milliseconds it took to load
         self.fix_path()
-        self.load_all()
+
+        if isinstance(linters, LazyLinters):
+            linters.loader = self
+            self.index_all()
+        else:
+            self.load_all()
 
     def fix_path(self):
         if os.name != 'posix':
@@ -61,25 +161,42 @@ class Loader(object):
 
             os.environ['PATH'] = u':'.join(dirs)
 
-    def load_all(self):
-        '''loads all existing linter modules'''
-        for modf in glob.glob(u'{0}/*.py'.format(self.basepath)):
+    def module_files(self):
+        '''returns (name, path) for each linter module'''
+        for modf in glob.glob(os.path.join(MODULES_PATH, u'*.py')):
             base, name = os.path.split(modf)
             name = name.split('.', 1)[0]
 
-            if name in self.ignored:
-                continue
+            if name not in self.ignored:
+                yield name, modf
+
+    def load_all(self):
+        '''loads all existing linter modules'''
+        for name, modf in self.module_files():
+            self.load_module(name, read_manifest(modf)[1])
+
+    def index_all(self):
+        '''reads the language of all existing linter modules, deferring
+           their import until their language is first looked up'''
+        start = time.time()
 
-            self.load_module(name)
+        for name, modf in self.module_files():
+            language, libs = read_manifest(modf)
 
-    def load_module(self, name):
-        '''loads a single linter module'''
-        fullmod = u'{0}.{1}'.format(self.modpath, name)
+            if language:
+                self.linters.manifest[language.lower()] = (name, libs)
+            else:
+                print u'SublimeLinter: {0} disabled (no language specified in module)'.format(name)
 
-        # make sure the path didn't change on us (this is needed for submodule reload)
-        pushd = os.getcwdu()
-        os.chdir(self.basedir)
+        elapsed = (time.time() - start) * 1000
+        print u'SublimeLinter: indexed {0} linters in {1:.1f} ms, deferred: {2}'.format(
+            len(self.linters.manifest), elapsed, u', '.join(sorted(self.linters.manifest)))
 
+    def load_module(self, name, libs=()):
+        '''loads a single linter module'''
+        fullmod = u'{0}.{1}'.format(self.modpath, name)
+        start = time.time()
+        import_libs(libs)
         __import__(fullmod)
 
         # this following line of code does two things:
@@ -114,15 +231,14 @@ class Loader(object):
 
                 lc_language = language.lower()
                 self.linters[lc_language] = linter
-                print u'SublimeLinter: {0} loaded'.format(language)
+                self.timings[name] = (time.time() - start) * 1000
+                print u'SublimeLinter: {0} loaded in {1:.1f} ms'.format(language, self.timings[name])
             else:
                 print u'SublimeLinter: {0} disabled (no language specified in module)'.format(name)
 
         except KeyError:
             print u'SublimeLinter: general error importing {0} ({1})'.format(name, language or '<unknown>')
 
-        os.chdir(pushd)
-
     def reload_module(self, module):
         '''reload a single linter module
            This method is meant to be used when editing a given
@@ -134,4 +250,4 @@ class Loader(object):
             return
 
         name = fullmod.replace(self.modpath + '.', '', 1)
-        self.load_module(name)
+        self.load_module(name, read_manifest(module.__file__)[1])
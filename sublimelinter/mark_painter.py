@@ -0,0 +1,165 @@
+'''mark_painter.py
+
+Paints lint marks in a view a batch at a time, so that a lint result with
+tens of thousands of marks doesn't stall the editor: the marks in and around
+the visible region are painted first, the rest in batches scheduled with
+sublime.set_timeout. Each batch is taken around the region visible at the
+time, so scrolling brings the marks being looked at forward.
+
+A mark layer is the set of regions added to a view under one key. Regions
+are only made when they are painted: outlines are kept as line numbers until
+then, as finding the region of a line is most of the cost of painting it.
+'''
+
+import bisect
+
+import sublime
+
+from tracing import TRACER
+
+# Results with up to this many marks are painted at once; otherwise this is
+# the size of the first batch painted after the visible marks, and each batch
+# is twice the size of the previous one
+PAINT_BATCH_SIZE = 5000
+
+
+class MarkLayer(object):
+    '''the regions of a view under key; by_row layers are made of line
+       numbers, others of regions. args are the remaining arguments of
+       view.add_regions.'''
+
+    def __init__(self, key, items, by_row, *args):
+        self.key = key
+        self.by_row = by_row
+        self.args = args
+        self.items = list(items)
+        self.positions = None
+
+    def sort(self):
+        '''sorts the items, so that they can be painted a part at a time'''
+        if self.by_row:
+            self.items.sort()
+            self.positions = self.items[:]
+        else:
+            # Sorting by the positions avoids calling begin() for each comparison
+            positions = [region.begin() for region in self.items]
+            order = sorted(xrange(len(positions)), key=positions.__getitem__)
+            self.items = [self.items[index] for index in order]
+            self.positions = [positions[index] for index in order]
+
+    def __len__(self):
+        return len(self.items)
+
+    def position(self, view, row):
+        if self.by_row:
+            return row
+        elif row > view.rowcol(view.size())[0]:
+            return view.size() + 1
+
+        return view.text_point(row, 0)
+
+    def paint(self, view, lo, hi):
+        '''paints the items from index lo to hi'''
+        if lo >= hi:
+            return
+
+        items = self.items[lo:hi]
+        del self.items[lo:hi]
+
+        if self.positions is not None:
+            del self.positions[lo:hi]
+
+        if self.by_row:
+            items = [view.full_line(view.text_point(row, 0)) for row in items]
+
+        # The regions painted before were moved by the view as it was edited
+        painted = view.get_regions(self.key)
+        painted.extend(items)
+        view.add_regions(self.key, painted, *self.args)
+
+    def paint_rows(self, view, first_row, last_row):
+        '''paints the items on lines first_row to last_row'''
+        self.paint(view,
+                   bisect.bisect_left(self.positions, self.position(view, first_row)),
+                   bisect.bisect_left(self.positions, self.position(view, last_row + 1)))
+
+    def paint_around(self, view, row, count):
+        '''paints count items closest to line row'''
+        index = bisect.bisect_left(self.positions, self.position(view, row))
+        lo = max(0, index - count // 2)
+        hi = min(len(self.items), lo + count)
+        self.paint(view, max(0, hi - count), hi)
+
+
+class MarkPainter(object):
+    '''paints layers of marks in view'''
+
+    def __init__(self, view, layers):
+        self.view = view
+        self.layers = [layer for layer in layers if len(layer)]
+        self.batch_size = PAINT_BATCH_SIZE
+        self.cancelled = False
+
+    def pending(self):
+        return sum(len(layer) for layer in self.layers)
+
+    def visible_rows(self):
+        '''returns the first and last rows of the visible region, with a
+           screen of margin on each side'''
+        visible = self.view.visible_region()
+        first = self.view.rowcol(visible.begin())[0]
+        last = self.view.rowcol(visible.end())[0]
+        height = last - first + 1
+        return max(0, first - height), last + height
+
+    def start(self):
+        '''paints the visible marks, and schedules painting the others'''
+        if self.pending() <= PAINT_BATCH_SIZE:
+            self.finish()
+            return
+
+        for layer in self.layers:
+            layer.sort()
+
+        self.paint_visible()
+        self.schedule()
+
+    def paint_visible(self):
+        if self.cancelled or not self.pending():
+            return
+
+        first, last = self.visible_rows()
+
+        for layer in self.layers:
+            layer.paint_rows(self.view, first, last)
+
+    def schedule(self):
+        if self.pending():
+            sublime.set_timeout(self.paint_batch, 0)
+
+    def paint_batch(self):
+        if self.cancelled:
+            return
+
+        count = self.pending()
+
+        with TRACER.span('paint marks', 'render', view=self.view.id(), pending=count):
+            first, last = self.visible_rows()
+
+            for layer in self.layers:
+                # Each layer gets its share of the batch
+                layer.paint_around(self.view, (first + last) // 2, max(1, self.batch_size * len(layer) // count))
+
+        self.batch_size *= 2
+        self.schedule()
+
+    def finish(self):
+        '''paints all the marks left'''
+        if self.cancelled:
+            return
+
+        for layer in self.layers:
+            layer.paint(self.view, 0, len(layer))
+
+    def cancel(self):
+        self.cancelled = True
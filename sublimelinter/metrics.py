@@ -0,0 +1,148 @@
+'''metrics.py
+
+Measures each lint: the time spent in each of its phases, and counts of what
+happened to it (cache hits, lints superseded in the queue or cancelled, idle
+lints preempted by a modification).
+Timings are kept per linter over the last WINDOW lints, the SublimeLinter:
+Show Lint Metrics command shows their percentiles.
+'''
+
+from collections import deque
+import threading
+import time
+
+from tracing import TRACER
+
+# The phases of a lint, in the order they are shown:
+#   total         the whole lint, including the phases below
+#   settings      resolving the view settings
+#   text          extracting the text of the view
+#   check         running the built in check or the executable
+#   spawn         starting the executable
+#   tool          the executable reading the code and writing its output
+#   parse_errors  parsing the output into messages and underlines
+#   render        adding the marks to the view
+#   region        linting the visible region of a huge file, instead of total
+#   idle          linting the whole of a huge file in the background
+PHASES = ('total', 'settings', 'text', 'check', 'spawn', 'tool', 'parse_errors', 'render', 'region', 'idle')
+
+COUNTERS = ('cache hits', 'cache misses', 'superseded', 'cancelled', 'preempted')
+
+# Number of recent timings kept for each linter and phase
+WINDOW = 500
+
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+def percentile(samples, fraction):
+    '''returns the nearest rank percentile of sorted samples'''
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+class Timer(object):
+    '''context manager recording the time spent in a phase, and tracing
+       it as a span when tracing is on'''
+
+    def __init__(self, metrics, linter, phase):
+        self.metrics = metrics
+        self.linter = linter
+        self.phase = phase
+        self.start = None
+        self.traced = False
+
+    def __enter__(self):
+        if TRACER.enabled:
+            self.traced = True
+            TRACER.event('B', self.phase, 'lint', {'linter': self.linter})
+
+        self.start = time.time()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.metrics.record(self.linter, self.phase, (time.time() - self.start) * 1000)
+
+        if self.traced:
+            TRACER.event('E', self.phase, 'lint')
+
+
+class Metrics(object):
+    '''rolling timings and counters, keyed by linter language'''
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = {}  # (linter, phase) -> recent milliseconds
+        self.counts = {}   # (linter, counter) -> count
+
+    def timer(self, linter, phase):
+        return Timer(self, linter, phase)
+
+    def record(self, linter, phase, milliseconds):
+        with self.lock:
+            samples = self.samples.get((linter, phase))
+
+            if samples is None:
+                samples = self.samples[(linter, phase)] = deque(maxlen=self.window)
+
+            samples.append(milliseconds)
+
+    def count(self, linter, counter, increment=1):
+        with self.lock:
+            self.counts[(linter, counter)] = self.counts.get((linter, counter), 0) + increment
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+            self.counts.clear()
+
+    def summary(self):
+        '''returns {linter: {'phases': {phase: (count, p50, p95, p99)}, 'counts': {counter: count}}}'''
+        with self.lock:
+            samples = dict((key, sorted(values)) for key, values in self.samples.iteritems())
+            counts = dict(self.counts)
+
+        linters = {}
+
+        for (linter, phase), values in samples.iteritems():
+            if values:
+                stats = [len(values)] + [percentile(values, fraction) for fraction in PERCENTILES]
+                linters.setdefault(linter, {'phases': {}, 'counts': {}})['phases'][phase] = tuple(stats)
+
+        for (linter, counter), count in counts.iteritems():
+            linters.setdefault(linter, {'phases': {}, 'counts': {}})['counts'][counter] = count
+
+        return linters
+
+    def report(self):
+        '''returns the summary as a text table'''
+        linters = self.summary()
+
+        if not linters:
+            return u'No lints measured yet.\n'
+
+        lines = [
+            u'Lint timings over the last {0} lints of each linter, in milliseconds.\n'.format(self.window),
+            u'{0:<16} {1:<14} {2:>6} {3:>9} {4:>9} {5:>9}'.format(u'linter', u'phase', u'count', u'p50', u'p95', u'p99'),
+        ]
+
+        for linter in sorted(linters):
+            phases = linters[linter]['phases']
+            name = linter
+
+            for phase in PHASES:
+                if phase in phases:
+                    count, p50, p95, p99 = phases[phase]
+                    lines.append(u'{0:<16} {1:<14} {2:>6} {3:>9.1f} {4:>9.1f} {5:>9.1f}'.format(name, phase, count, p50, p95, p99))
+                    name = u''
+
+        lines.append(u'')
+        lines.append(u'{0:<16} '.format(u'linter') + u' '.join(u'{0:>12}'.format(counter) for counter in COUNTERS))
+
+        for linter in sorted(linters):
+            counts = linters[linter]['counts']
+            lines.append(u'{0:<16} '.format(linter) + u' '.join(u'{0:>12}'.format(counts.get(counter, 0)) for counter in COUNTERS))
+
+        return u'\n'.join(lines) + u'\n'
+
+
+METRICS = Metrics()
@@ -1,13 +1,20 @@
 # base_linter.py - base class for linters
 
+import copy
+from functools import partial
+import hashlib
 import os
 import os.path
 import json
 import re
 import subprocess
+import sys
 
 import sublime
 
+from sublimelinter.metrics import METRICS
+from sublimelinter.tracing import TRACER
+
 # If the linter uses an executable that takes stdin, use this input method.
 INPUT_METHOD_STDIN = 1
 
@@ -21,6 +28,10 @@ INPUT_METHOD_TEMP_FILE = 2
 # linting occur only on file load and save, use this input method.
 INPUT_METHOD_FILE = 3
 
+# Severities of the results of JavaScript-based linters
+JAVASCRIPT_ERROR = 0
+JAVASCRIPT_WARNING = 1
+
 CONFIG = {
     # The display language name for this linter.
     'language': '',
@@ -64,6 +75,79 @@ CONFIG = {
     'input_method': INPUT_METHOD_STDIN
 }
 
+# All available settings for SublimeLinter;
+# only these are inherited from SublimeLinter.sublime-settings
+ALL_SETTINGS = [
+    'annotations',
+    'annotations_comments_only',
+    'annotations_whole_words',
+    'csslint_options',
+    'gjslint_ignore',
+    'gjslint_options',
+    'golint_options',
+    'javascript_linter',
+    'jshint_options',
+    'jslint_options',
+    'pep8',
+    'pep8_ignore',
+    'perl_linter',
+    'pyflakes_doctests',
+    'pyflakes_ignore',
+    'pyflakes_ignore_import_*',
+    'python_changed_lines_only',
+    'sublimelinter',
+    'sublimelinter_delay',
+    'sublimelinter_disable',
+    'sublimelinter_executable_map',
+    'sublimelinter_fill_outlines',
+    'sublimelinter_gutter_marks',
+    'sublimelinter_gutter_marks_theme',
+    'sublimelinter_huge_file_idle_delay',
+    'sublimelinter_huge_file_margin',
+    'sublimelinter_huge_file_size',
+    'sublimelinter_mark_style',
+    'sublimelinter_notes',
+    'sublimelinter_objj_check_ascii',
+    'sublimelinter_popup_errors_on_save',
+    'sublimelinter_result_cache',
+    'sublimelinter_result_cache_size',
+    'sublimelinter_syntax_map',
+    'sublimelinter_wrap_find',
+]
+
+# The view settings captured by a settings snapshot
+SNAPSHOT_SETTINGS = ALL_SETTINGS + [
+    'SublimeLinter',  # per-project settings
+    'pyflakes_disabled',
+    'syntax',
+]
+
+# Settings snapshots by view id, dropped when a view's settings change
+SETTINGS_SNAPSHOTS = {}
+
+# Text snapshots of the views being linted, by view id; only kept for the
+# duration of a lint cycle
+TEXT_SNAPSHOTS = {}
+
+# Spans of each view modified since its last lint cycle, by view id; None if
+# they are not known
+DIRTY_REGIONS = {}
+
+# Above this many separate dirty regions, they are merged into one
+MAX_DIRTY_REGIONS = 32
+
+# The size of each view at its last lint cycle or modification, by view id,
+# which tells how much text a modification inserted or deleted
+VIEW_SIZES = {}
+
+# The span of the selections of each view at its last selection change or
+# modification, by view id: (begin, end); edits start at the selections
+VIEW_SELECTIONS = {}
+
+# The ALL_SETTINGS values set in SublimeLinter.sublime-settings, which view
+# settings default to; resolved on first use and dropped when the file changes
+PACKAGE_SETTINGS = None
+
 TEMPFILES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__.encode('utf-8')), u'..', u'.tempfiles'))
 
 JSON_MULTILINE_COMMENT_RE = re.compile(r'\/\*[\s\S]*?\*\/')
@@ -73,6 +157,269 @@ if not os.path.exists(TEMPFILES_DIR):
     os.mkdir(TEMPFILES_DIR)
 
 
+def freeze(value):
+    '''Returns a hashable copy of a settings value.'''
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.iteritems()))
+    elif isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    else:
+        return value
+
+
+def get_package_settings():
+    '''Returns the values set in SublimeLinter.sublime-settings.'''
+    global PACKAGE_SETTINGS
+
+    if PACKAGE_SETTINGS is None:
+        settings = sublime.load_settings('SublimeLinter.sublime-settings')
+        settings.clear_on_change('SublimeLinter.defaults')
+        settings.add_on_change('SublimeLinter.defaults', invalidate_package_settings)
+        values = {}
+
+        for setting in ALL_SETTINGS:
+            value = settings.get(setting)
+
+            if value is not None:
+                values[setting] = value
+
+        # Background linting is on unless it is turned off
+        values.setdefault('sublimelinter', True)
+        PACKAGE_SETTINGS = values
+
+        # Read from the package settings only, views don't need it
+        TRACER.enable(bool(settings.get('sublimelinter_trace', False)))
+
+    return PACKAGE_SETTINGS
+
+
+def invalidate_package_settings():
+    '''Drops the package settings, and the snapshots they were resolved in.'''
+    global PACKAGE_SETTINGS
+    PACKAGE_SETTINGS = None
+    SETTINGS_SNAPSHOTS.clear()
+
+
+class SettingsSnapshot(object):
+    '''An immutable, hashable copy of the SNAPSHOT_SETTINGS of a view.
+
+       It has the same get() method as sublime.Settings. Values must not be
+       modified. Settings not set on the view default to those of defaults,
+       the package settings; settings that are not in SNAPSHOT_SETTINGS are
+       read from the view's live settings. The fingerprint identifies the
+       values and is stable across sessions, so it can be used in cache keys.'''
+    __slots__ = ('_settings', '_values', '_frozen', '_hash', 'fingerprint')
+
+    def __init__(self, settings, defaults=None):
+        values = {}
+        defaults = defaults or {}
+
+        for key in SNAPSHOT_SETTINGS:
+            value = settings.get(key)
+
+            if value is None:
+                value = defaults.get(key)
+
+            if value is not None:
+                values[key] = value
+
+        self._settings = settings
+        self._values = values
+        self._frozen = freeze(values)
+        self._hash = hash(self._frozen)
+        self.fingerprint = hashlib.sha1(repr(self._frozen)).hexdigest()
+
+    def get(self, key, default=None):
+        if key in self._values:
+            return self._values[key]
+        elif key in SNAPSHOT_SETTINGS:
+            return default
+        else:
+            return self._settings.get(key, default)
+
+    def values(self):
+        '''Returns a copy of the snapshot values, e.g. to set up a stand-in view.'''
+        return dict(self._values)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        return isinstance(other, SettingsSnapshot) and self._frozen == other._frozen
+
+    def __ne__(self, other):
+        return not self == other
+
+
+def get_view_settings(view):
+    '''Returns the settings snapshot of a view, resolving it if the view's
+       settings changed since it was last taken.'''
+    vid = view.id()
+    snapshot = SETTINGS_SNAPSHOTS.get(vid)
+
+    if snapshot is None:
+        settings = view.settings()
+        snapshot = SETTINGS_SNAPSHOTS[vid] = SettingsSnapshot(settings, get_package_settings())
+        settings.clear_on_change('SublimeLinter.snapshot')
+        settings.add_on_change('SublimeLinter.snapshot', partial(invalidate_view_settings, vid))
+
+    return snapshot
+
+
+def invalidate_view_settings(vid):
+    '''Drops the settings snapshot of a view.'''
+    SETTINGS_SNAPSHOTS.pop(vid, None)
+
+
+class TextSnapshot(object):
+    '''The text of a view, extracted once per lint cycle and shared by the
+       linter and the annotations. The UTF-8 encoded text is computed on
+       first use. dirty is the sorted list of regions modified since the
+       previous cycle, or None if unknown.'''
+    __slots__ = ('text', 'dirty', '_encoded')
+
+    def __init__(self, text, dirty=None):
+        self.text = text
+        self.dirty = dirty
+        self._encoded = None
+
+    @property
+    def encoded(self):
+        if self._encoded is None:
+            self._encoded = self.text.encode('utf-8')
+
+        return self._encoded
+
+    def dirty_region(self):
+        '''Returns the region spanning all modifications, empty at the end of
+           the text if there were none, or None if the whole text must be
+           considered modified.'''
+        if self.dirty is None:
+            return None
+        elif not self.dirty:
+            return sublime.Region(len(self.text), len(self.text))
+
+        return sublime.Region(self.dirty[0].begin(), min(self.dirty[-1].end(), len(self.text)))
+
+    def dirty_text(self):
+        '''Returns (offset, text) of the modified span, which is the whole
+           text if the modifications are unknown.'''
+        region = self.dirty_region()
+
+        if region is None:
+            return 0, self.text
+
+        return region.begin(), self.text[region.begin():region.end()]
+
+
+def note_selection(view):
+    '''Records the span of the selections of view; meant to be called from
+       on_selection_modified, so that mark_dirty knows where an edit started.'''
+    selections = view.sel()
+
+    if len(selections):
+        VIEW_SELECTIONS[view.id()] = (selections[0].begin(), selections[-1].end())
+
+
+def mark_dirty(view):
+    '''Records the span changed by the modification on_modified is called
+       for, comparing the size and the selections of the view with those
+       before it: an edit starts at the selections before it, or before
+       those after it by the size of the text inserted, and ends at the
+       selections after it. The spans recorded before are moved by the
+       change.'''
+    vid = view.id()
+    size = view.size()
+    previous_size = VIEW_SIZES.get(vid)
+    previous_selection = VIEW_SELECTIONS.get(vid)
+    VIEW_SIZES[vid] = size
+    note_selection(view)
+    regions = DIRTY_REGIONS.get(vid, [])
+    selections = view.sel()
+
+    # The size before the edit is not known if the view was never linted
+    if previous_size is None or regions is None or not len(selections):
+        DIRTY_REGIONS[vid] = None
+        return
+
+    change = size - previous_size
+    begin = max(0, selections[0].begin() - max(change, 0))
+    end = selections[-1].end()
+
+    if previous_selection is not None:
+        begin = min(begin, previous_selection[0])
+        end = max(end, previous_selection[1] + change)
+
+    end = min(max(begin, end), size)
+    edited = view.full_line(sublime.Region(begin, end))
+    moved = [edited]
+
+    for region in regions:
+        if region.end() < begin:
+            moved.append(region)
+        elif region.begin() >= begin:
+            # After the edit: moved with the text, or deleted with it
+            moved.append(sublime.Region(min(max(region.begin() + change, begin), size),
+                                        min(max(region.end() + change, begin), size)))
+        else:
+            moved.append(sublime.Region(region.begin(), min(max(region.end() + change, end), size)))
+
+    moved.sort(key=lambda region: region.begin())
+    merged = [moved[0]]
+
+    for region in moved[1:]:
+        if region.begin() <= merged[-1].end():
+            merged[-1] = merged[-1].cover(region)
+        else:
+            merged.append(region)
+
+    if len(merged) > MAX_DIRTY_REGIONS:
+        merged = [merged[0].cover(merged[-1])]
+
+    DIRTY_REGIONS[vid] = merged
+
+
+def take_text_snapshot(view):
+    '''Extracts the text of a view for a new lint cycle.'''
+    vid = view.id()
+    # Nothing was modified since the last cycle if no span was recorded
+    dirty = DIRTY_REGIONS.pop(vid, []) if vid in VIEW_SIZES else None
+    VIEW_SIZES[vid] = view.size()
+    snapshot = TEXT_SNAPSHOTS[vid] = TextSnapshot(view.substr(sublime.Region(0, view.size())), dirty)
+    return snapshot
+
+
+def get_text_snapshot(view):
+    '''Returns the text snapshot of the current lint cycle of a view, or None
+       outside of one.'''
+    return TEXT_SNAPSHOTS.get(view.id())
+
+
+def release_text_snapshot(vid):
+    '''Drops the text snapshot at the end of a lint cycle.'''
+    TEXT_SNAPSHOTS.pop(vid, None)
+
+
+def forget_text(vid):
+    '''Drops the snapshot and the modifications kept for a closed view.'''
+    for store in (TEXT_SNAPSHOTS, DIRTY_REGIONS, VIEW_SIZES, VIEW_SELECTIONS):
+        store.pop(vid, None)
+
+
+def which(executable):
+    '''Returns the path of an executable found on the PATH, or None.'''
+    if os.path.isabs(executable):
+        return executable
+
+    for directory in os.environ.get('PATH', '').split(os.pathsep):
+        path = os.path.join(directory, executable)
+
+        if os.path.isfile(path):
+            return path
+
+    return None
+
+
 class BaseLinter(object):
     '''A base class for linters. Your linter module needs to do the following:
 
@@ -93,6 +440,16 @@ class BaseLinter(object):
     JAVASCRIPT_ENGINE_NAMES = {'node': 'node.js', 'jsc': 'JavaScriptCore'}
     JAVASCRIPT_ENGINE_WRAPPERS_PATH = os.path.join(LIB_PATH, 'jsengines')
 
+    # Set to False if the result of linting does not only depend on the text,
+    # the settings and the file name, e.g. when other files are read.
+    cacheable = True
+
+    # Set to False if huge files must not be linted a region at a time
+    # while they are modified (see region_lint.py).
+    lints_regions = True
+
+    _fingerprint = None
+
     def __init__(self, config):
         self.language = config['language']
         self.enabled = False
@@ -110,6 +467,12 @@ class BaseLinter(object):
         if isinstance(self.lint_args, basestring):
             self.lint_args = [self.lint_args]
 
+    def copy(self):
+        '''returns a copy of the linter to run in another thread: run keeps
+           the state of a lint in the linter (the filename, the engine...),
+           so the same linter must not run in two threads at once'''
+        return copy.copy(self)
+
     def check_enabled(self, view):
         if hasattr(self, 'get_executable'):
             try:
@@ -152,18 +515,24 @@ class BaseLinter(object):
             return self.get_lint_args(view, code, filename) or []
         else:
             lintArgs = self.lint_args or []
-            settings = view.settings().get('SublimeLinter', {}).get(self.language, {})
+            settings = get_view_settings(view).get('SublimeLinter', {}).get(self.language, {})
 
-            if settings:
-                if 'lint_args' in settings:
-                    lintArgs = settings['lint_args']
+            if settings and 'lint_args' in settings:
+                lintArgs = settings['lint_args']
 
-                cwd = settings.get('working_directory', '').encode('utf-8')
+            return [arg.format(filename=filename) for arg in lintArgs]
 
-                if cwd and os.path.isabs(cwd) and os.path.isdir(cwd):
-                    os.chdir(cwd)
+    def _get_working_directory(self, view):
+        '''Returns the per-project working directory for the linter executable,
+           or None to use the current one. It is passed to the subprocess
+           rather than changing the working directory of the whole process.'''
+        settings = get_view_settings(view).get('SublimeLinter', {}).get(self.language, {})
+        cwd = settings.get('working_directory', '').encode('utf-8')
 
-            return [arg.format(filename=filename) for arg in lintArgs]
+        if cwd and os.path.isabs(cwd) and os.path.isdir(cwd):
+            return cwd
+
+        return None
 
     def built_in_check(self, view, code, filename):
         return ''
@@ -197,13 +566,17 @@ class BaseLinter(object):
             return u''
 
         try:
-            process = subprocess.Popen(args,
-                                       stdin=subprocess.PIPE,
-                                       stdout=subprocess.PIPE,
-                                       stderr=subprocess.STDOUT,
-                                       startupinfo=self.get_startupinfo())
-            process.stdin.write(code)
-            result = process.communicate()[0]
+            with METRICS.timer(self.language, 'spawn'):
+                process = subprocess.Popen(args,
+                                           stdin=subprocess.PIPE,
+                                           stdout=subprocess.PIPE,
+                                           stderr=subprocess.STDOUT,
+                                           cwd=self._get_working_directory(view),
+                                           startupinfo=self.get_startupinfo())
+
+            with METRICS.timer(self.language, 'tool'):
+                process.stdin.write(code)
+                result = process.communicate()[0]
         finally:
             if tempfilePath:
                 os.remove(tempfilePath)
@@ -275,10 +648,11 @@ class BaseLinter(object):
     def run(self, view, code, filename=None):
         self.filename = filename
 
-        if self.executable is None:
-            errors = self.built_in_check(view, code, filename)
-        else:
-            errors = self.executable_check(view, code, filename)
+        with METRICS.timer(self.language, 'check'):
+            if self.executable is None:
+                errors = self.built_in_check(view, code, filename)
+            else:
+                errors = self.executable_check(view, code, filename)
 
         lines = set()
         errorUnderlines = []  # leave this here for compatibility with original plugin
@@ -288,11 +662,40 @@ class BaseLinter(object):
         warningUnderlines = []
         warningMessages = {}
 
-        self.parse_errors(view, errors, lines, errorUnderlines, violationUnderlines, warningUnderlines, errorMessages, violationMessages, warningMessages)
+        with METRICS.timer(self.language, 'parse_errors'):
+            self.parse_errors(view, errors, lines, errorUnderlines, violationUnderlines, warningUnderlines, errorMessages, violationMessages, warningMessages)
+
         return lines, errorUnderlines, violationUnderlines, warningUnderlines, errorMessages, violationMessages, warningMessages
 
+    def is_cacheable(self, view):
+        '''Returns whether the result of linting view can be cached. Linters
+           run on the file itself may read other files of the project.'''
+        return self.cacheable and self.input_method != INPUT_METHOD_FILE
+
+    def get_fingerprint(self):
+        '''Identifies the version of this linter by the modification times
+           of its module, of this module and of the executable it runs.'''
+        engine = (self.js_engine or {}).get('path')
+        key = (self.executable, engine)
+
+        if self._fingerprint is None or self._fingerprint[0] != key:
+            paths = [sys.modules[self.__module__].__file__.rstrip('co'), __file__.rstrip('co')]
+            paths.extend(which(executable) for executable in key if isinstance(executable, basestring))
+            stamps = []
+
+            for path in paths:
+                try:
+                    stat = os.stat(path)
+                    stamps.append('{0}:{1}:{2}'.format(path, stat.st_mtime, stat.st_size))
+                except (OSError, TypeError):
+                    stamps.append(repr(path))
+
+            self._fingerprint = (key, hashlib.sha1('\n'.join(stamps)).hexdigest())
+
+        return self._fingerprint[1]
+
     def get_mapped_executable(self, view, default):
-        map = view.settings().get('sublimelinter_executable_map')
+        map = get_view_settings(view).get('sublimelinter_executable_map')
 
         if map:
             lang = self.language.lower()
@@ -359,7 +762,7 @@ class BaseLinter(object):
         options = self.get_javascript_options(view)
 
         if options is None:
-            options = json.dumps(view.settings().get('%s_options' % linter) or {})
+            options = json.dumps(get_view_settings(view).get('%s_options' % linter) or {})
 
         self.get_javascript_engine(view)
         engine = self.js_engine
@@ -371,6 +774,22 @@ class BaseLinter(object):
 
         return args
 
+    def iter_javascript_results(self, output, linter):
+        '''Yields (line, character, severity, code, message) from the output of
+           a JavaScript-based linter. Its linter.js writes the results as
+           {"messages": [message, ...], "results": [[line, character, severity,
+           code, message index], ...]}, severity is JAVASCRIPT_ERROR or
+           JAVASCRIPT_WARNING, and code is None if the linter has no codes.'''
+        try:
+            output = json.loads(output.strip() or '{}')
+        except ValueError:
+            raise ValueError("Error from {0}: {1}".format(linter, output))
+
+        messages = output.get('messages', [])
+
+        for line, character, severity, code, message in output.get('results', []):
+            yield line, character, severity, code, messages[message]
+
     def get_javascript_options(self, view):
         '''Subclasses should override this if they want to provide options
            for a JavaScript-based linter. If the subclass cannot provide
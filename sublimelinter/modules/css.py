@@ -1,6 +1,4 @@
-import json
-
-from base_linter import BaseLinter
+from base_linter import BaseLinter, JAVASCRIPT_WARNING
 
 CONFIG = {
     'language': 'CSS'
@@ -18,20 +16,13 @@ class Linter(BaseLinter):
         return self.get_javascript_args(view, 'csslint', code)
 
     def parse_errors(self, view, errors, lines, errorUnderlines, violationUnderlines, warningUnderlines, errorMessages, violationMessages, warningMessages):
-        try:
-            errors = json.loads(errors.strip() or '[]')
-        except ValueError:
-            raise ValueError("Error from csslint: {0}".format(errors))
-
-        for error in errors:
-            lineno = error['line']
-
-            if error['type'] == 'warning':
+        for lineno, character, severity, code, message in self.iter_javascript_results(errors, 'csslint'):
+            if severity == JAVASCRIPT_WARNING:
                 messages = warningMessages
                 underlines = warningUnderlines
             else:
                 messages = errorMessages
                 underlines = errorUnderlines
 
-            self.add_message(lineno, lines, error['reason'], messages)
-            self.underline_range(view, lineno, error['character'] - 1, underlines)
+            self.add_message(lineno, lines, message, messages)
+            self.underline_range(view, lineno, character - 1, underlines)
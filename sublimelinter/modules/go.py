@@ -8,7 +8,7 @@ import subprocess
 from collections import namedtuple
 from distutils.spawn import find_executable
 
-from base_linter import BaseLinter, INPUT_METHOD_FILE
+from base_linter import BaseLinter, INPUT_METHOD_FILE, get_view_settings
 
 CONFIG = {
     'language': 'Go',
@@ -139,7 +139,7 @@ class Linter(BaseLinter):
 
     def built_in_check(self, view, code, filename):
         if not self.linters:
-            config = view.settings()
+            config = get_view_settings(view)
             disabled = config.get('golint_options', {}).get('disabled', [])
             print disabled
             self.linters = []
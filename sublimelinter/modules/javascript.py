@@ -2,7 +2,7 @@ import json
 import re
 import subprocess
 
-from base_linter import BaseLinter, INPUT_METHOD_TEMP_FILE
+from base_linter import BaseLinter, INPUT_METHOD_TEMP_FILE, get_view_settings
 
 CONFIG = {
     'language': 'JavaScript'
@@ -17,7 +17,7 @@ class Linter(BaseLinter):
         self.linter = None
 
     def get_executable(self, view):
-        self.linter = view.settings().get('javascript_linter', 'jshint')
+        self.linter = get_view_settings(view).get('javascript_linter', 'jshint')
 
         if (self.linter in ('jshint', 'jslint')):
             return self.get_javascript_engine(view)
@@ -32,10 +32,14 @@ class Linter(BaseLinter):
         else:
             return (False, '', '"{0}" is not a valid javascript linter'.format(self.linter))
 
+    def is_cacheable(self, view):
+        # jshint reads its options from the nearest .jshintrc
+        return self.linter != 'jshint' and super(Linter, self).is_cacheable(view)
+
     def get_lint_args(self, view, code, filename):
         if (self.linter == 'gjslint'):
             args = []
-            gjslint_options = view.settings().get("gjslint_options", [])
+            gjslint_options = get_view_settings(view).get("gjslint_options", [])
             args.extend(gjslint_options)
             args.extend([u'--nobeep', filename])
             return args
@@ -54,7 +58,7 @@ class Linter(BaseLinter):
 
     def parse_errors(self, view, errors, lines, errorUnderlines, violationUnderlines, warningUnderlines, errorMessages, violationMessages, warningMessages):
         if (self.linter == 'gjslint'):
-            ignore = view.settings().get('gjslint_ignore', [])
+            ignore = get_view_settings(view).get('gjslint_ignore', [])
 
             for line in errors.splitlines():
                 match = self.GJSLINT_RE.match(line)
@@ -66,12 +70,7 @@ class Linter(BaseLinter):
                         self.add_message(int(line), lines, message, errorMessages)
 
         elif (self.linter in ('jshint', 'jslint')):
-            try:
-                errors = json.loads(errors.strip() or '[]')
-            except ValueError:
-                raise ValueError("Error from {0}: {1}".format(self.linter, errors))
-
-            for error in errors:
-                lineno = error['line']
-                self.add_message(lineno, lines, error['reason'], errorMessages)
-                self.underline_range(view, lineno, error['character'] - 1, errorUnderlines)
+            # Whatever their severity, jshint and jslint problems are errors
+            for lineno, character, severity, code, message in self.iter_javascript_results(errors, self.linter):
+                self.add_message(lineno, lines, message, errorMessages)
+                self.underline_range(view, lineno, character - 1, errorUnderlines)
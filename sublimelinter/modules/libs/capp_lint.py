@@ -31,11 +31,14 @@ from __future__ import with_statement
 from optparse import OptionParser
 from string import Template
 import cgi
+import bisect
 import cStringIO
+import itertools
 import os
 import os.path
 import re
 import sys
+import time
 import unittest
 
 EXIT_CODE_SHOW_HTML = 205
@@ -70,6 +73,33 @@ def tabs2spaces(text, positions=None):
             positions.append(index)
 
 
+def preprocessor(processor):
+    """Return a function applying a preprocess step of LintChecker.LINE_CHECKLIST to a line."""
+
+    regex = processor.get('regex')
+    fnct = processor.get('function')
+
+    def process(line):
+        if regex:
+            line = regex.sub(processor.get('replace', ''), line)
+
+        if fnct:
+            line = fnct(line)
+
+        return line
+
+    return process
+
+
+def check_file(task):
+    """Lint a file with a new checker, for LintChecker.lint; may run in a pool process."""
+
+    basedir, filename, varDeclarations, verbose, settings = task
+    checker = LintChecker(basedir=basedir, var_declarations=varDeclarations, verbose=verbose, settings=settings)
+    checker.lint_file(filename)
+    return (filename, checker.errors, checker.lineNum)
+
+
 def relative_path(basedir, filename):
     if filename.find(basedir) == 0:
         filename = filename[len(basedir) + 1:]
@@ -168,11 +198,21 @@ class LintChecker(object):
         )
     '''
 
+    # Regexes compiled from the templates above, keyed by (template, indent)
+    TEMPLATE_RE_CACHE = {}
+
+    # check_var_blocks records a checkpoint of its state at the first top level
+    # statement after every CHECKPOINT_INTERVAL lines
+    CHECKPOINT_INTERVAL = 100
+
     STATEMENT_RE = re.compile(ur'''(?x)
         \s*((continue|do|for|function|if|else|return|switch|while|with)\b|\[+\s*[a-zA-Z_$]\w*\s+[a-zA-Z_$]\w*\s*[:\]])
     ''')
 
     TRAILING_WHITESPACE_RE = re.compile(ur'^.*(\s+)$')
+    CONTROL_STATEMENT_RE = re.compile(ur'^\s*(?:(?:else )?if|for|switch|while|with)')
+    BINARY_OPERATOR_CHAR_RE = re.compile(ur'[-+*/%^&|<>]')
+    COMPARISON_OPERATOR_CHAR_RE = re.compile(ur'[=<>]')
     STRIP_LINE_COMMENT_RE = re.compile(ur'(.*)\s*(?://.*|/\*.*\*/\s*)$')
     LINE_COMMENT_RE = re.compile(ur'\s*(?:/\*.*\*/\s*|//.*)$')
     COMMENT_RE = re.compile(ur'/\*.*?\*/')
@@ -222,6 +262,8 @@ class LintChecker(object):
         {'regex': DECIMAL_LITERAL_RE, 'replace': '42'},
     )
 
+    # A check's 'prefilter' is a cheap test of the original line which is false
+    # when the check's regex can't match, so the regex is not run at all.
     LINE_CHECKLIST = (
         {
             'id': 'tabs',
@@ -239,30 +281,35 @@ class LintChecker(object):
         },
         {
             'regex': re.compile(ur'^\s*(?:(?:else )?if|for|switch|while|with)(\()'),
+            'prefilter': CONTROL_STATEMENT_RE.match,
             'error': 'missing space between control statement and parentheses',
             'showPositionForGroup': 1,
             'type': ERROR_TYPE_WARNING
         },
         {
             'regex': re.compile(ur'^\s*(?:(?:else )?if|for|switch|while|with)\s*\(.+\)\s*(\{)\s*(?://.*|/\*.*\*/\s*)?$'),
+            'prefilter': CONTROL_STATEMENT_RE.match,
             'error': 'braces should be on their own line',
             'showPositionForGroup': 1,
             'type': ERROR_TYPE_ILLEGAL
         },
         {
             'regex': re.compile(ur'^\s*(?:(?:else )?if|for|switch|while|with)\s*\((\s+)?.+?(\s+)?\)\s*(?:(?:\{|//.*|/\*.*\*/)\s*)?$'),
+            'prefilter': CONTROL_STATEMENT_RE.match,
             'error': 'space inside parentheses',
             'showPositionForGroup': [1, 2],
             'type': ERROR_TYPE_ILLEGAL
         },
         {
             'regex': re.compile(ur'^\s*(?:(?:else )?if|for|switch|while|with)\s*\(.+\)\s*(?:[\w_]|\[).+(;)\s*(?://.*|/\*.*\*/\s*)?$'),
+            'prefilter': CONTROL_STATEMENT_RE.match,
             'error': 'dependent statements must be on their own line',
             'showPositionForGroup': 1,
             'type': ERROR_TYPE_ILLEGAL
         },
         {
             'regex': TRAILING_WHITESPACE_RE,
+            'prefilter': lambda line: line[-1:].isspace(),
             'error': 'trailing whitespace',
             'showPositionForGroup': 1,
             'type': ERROR_TYPE_ILLEGAL
@@ -272,6 +319,7 @@ class LintChecker(object):
             'filter': {'regex': re.compile(ur'(^@import\b|^\s*' + METHOD_RE + '|^\s*[a-zA-Z_$]\w*:\s*\([a-zA-Z_$][\w<>]*\)\s*\w+|[a-zA-Z_$]\w*(\+\+|--)|([ -+*/%^&|<>!]=?|&&|\|\||<<|>>>|={1,3}|!==?)\s*[-+][\w(\[])'), 'pass': False},
 
             # Also convert literals like 1.5e+7 to 42 so that the - or + in there is ignored for purposes of this warning.
+            'prefilter': BINARY_OPERATOR_CHAR_RE.search,
             'preprocess': STD_IGNORES + EXPONENTIAL_TO_SIMPLE,
             'regex': re.compile(ur'(?<=[\w)\]"\']|([ ]))([-+*/%^]|&&?|\|\|?|<<|>>>?)(?=[\w({\["\']|(?(1)\b\b|[ ]))'),
             'error': 'binary operator without surrounding spaces',
@@ -282,6 +330,7 @@ class LintChecker(object):
             # Filter out possible = within @accessors
             'filter': {'regex': re.compile(ur'^\s*(?:@outlet\s+)?[a-zA-Z_$]\w*\s+[a-zA-Z_$]\w*\s+@accessors\b'), 'pass': False},
 
+            'prefilter': lambda line: u'=' in line,
             'preprocess': STD_IGNORES,
             'regex': re.compile(ur'(?<=[\w)\]"\']|([ ]))(=|[-+*/%^&|]=|<<=|>>>?=)(?=[\w({\["\']|(?(1)\b\b|[ ]))'),
             'error': 'assignment operator without surrounding spaces',
@@ -292,6 +341,7 @@ class LintChecker(object):
             # Filter out @import statements and @implementation/method declarations
             'filter': {'regex': re.compile(ur'^(@import\b|@implementation\b|\s*' + METHOD_RE + ')'), 'pass': False},
 
+            'prefilter': COMPARISON_OPERATOR_CHAR_RE.search,
             'preprocess': STD_IGNORES,
             'regex': re.compile(ur'(?<=[\w)\]"\']|([ ]))(===?|!==?|[<>]=?)(?=[\w({\["\']|(?(1)\b\b|[ ]))'),
             'error': 'comparison operator without surrounding spaces',
@@ -300,12 +350,14 @@ class LintChecker(object):
         },
         {
             'regex': re.compile(ur'^(\s+)' + METHOD_RE + '|^\s*[-+](\()[a-zA-Z_$][\w]*\)\s*[a-zA-Z_$]\w*|^\s*[-+]\s*\([a-zA-Z_$][\w]*\)(\s+)[a-zA-Z_$]\w*'),
+            'prefilter': lambda line: line.lstrip()[:1] in (u'-', u'+'),
             'error': 'extra or missing space in a method declaration',
             'showPositionForGroup': 0,
             'type': ERROR_TYPE_WARNING
         },
         {
             # Check for brace following a class or method declaration
+            'prefilter': lambda line: u'{' in line,
             'regex': re.compile(ur'^(?:\s*[-+]\s*\([a-zA-Z_$]\w*\)|@implementation)\s*[a-zA-Z_$][\w]*.*?\s*(\{)\s*(?:$|//.*$)'),
             'error': 'braces should be on their own line',
             'showPositionForGroup': 0,
@@ -313,6 +365,7 @@ class LintChecker(object):
         },
         {
             'regex': re.compile(ur'^\s*var\s+[a-zA-Z_$]\w*\s*=\s*function\s+([a-zA-Z_$]\w*)\s*\('),
+            'prefilter': lambda line: u'function' in line,
             'error': 'function name is ignored',
             'showPositionForGroup': 1,
             'skip': True,
@@ -331,18 +384,31 @@ class LintChecker(object):
     TEXT_ERROR_SINGLE_FILE_TEMPLATE = Template(u'$lineNum: $message.\n+$line\n')
     TEXT_ERROR_MULTI_FILE_TEMPLATE = Template(u'$filename:$lineNum: $message.\n+$line\n')
 
-    def __init__(self, view=None, basedir='', var_declarations=VAR_DECLARATIONS_SINGLE, verbose=False):
+    def __init__(self, view=None, basedir='', var_declarations=VAR_DECLARATIONS_SINGLE, verbose=False, settings=None):
         self.view = view
-        self.basedir = unicode(basedir, 'utf-8')
+
+        # Settings used to enable optional checks; defaults to the view's settings
+        if settings is None and view is not None:
+            settings = view.settings()
+
+        self.settings = settings
+        self.basedir = basedir if isinstance(basedir, unicode) else unicode(basedir, 'utf-8')
         self.errors = []
         self.errorFiles = []
+        self.errorFileIndex = set()
         self.filesToCheck = []
+        self.stats = None
         self.varDeclarations = var_declarations
         self.verbose = verbose
         self.sourcefile = None
         self.filename = u''
         self.line = u''
         self.lineNum = 0
+        self.offset = 0
+        self.lineEnded = True
+        self.text = None
+        self.checkpoints = []
+        self.checkpoint = None
         self.varIndent = u''
         self.identifierIndent = u''
 
@@ -350,65 +416,100 @@ class LintChecker(object):
             {'title': 'Check variable blocks', 'action': self.check_var_blocks},
         )
 
-    def run_line_checks(self):
+        # Option gates are resolved once, settings are not read again for each line
+        self.lineChecks = self.compile_line_checks()
+
+    def compile_line_checks(self):
+        '''Returns the checks of LINE_CHECKLIST enabled by the settings, as tuples
+           ready to be run on each line by run_line_checks.
+
+           The preprocess chain of a check becomes a list of (key, function) steps,
+           where key identifies the chain up to and including that step, so that
+           checks sharing a chain prefix (like STD_IGNORES) share its results.'''
+        checks = []
+
         for check in self.LINE_CHECKLIST:
             option = check.get('option')
 
-            if option:
-                default = check.get('optionDefault', False)
+            if option and self.settings is not None and not self.settings.get(option, check.get('optionDefault', False)):
+                continue
 
-                if self.view and not self.view.settings().get(option, default):
-                    continue
+            regex = check.get('regex')
+
+            if not regex:
+                continue
 
-            line = self.line
-            originalLine = line
             lineFilter = check.get('filter')
 
             if lineFilter:
-                match = lineFilter['regex'].search(line)
+                filterSearch = lineFilter['regex'].search
+                filterPass = lineFilter['pass']
+            else:
+                filterSearch = filterPass = None
 
-                if (match and not lineFilter['pass']) or (not match and lineFilter['pass']):
-                    continue
+            preprocess = check.get('preprocess') or ()
 
-            preprocess = check.get('preprocess')
+            if not isinstance(preprocess, (list, tuple)):
+                preprocess = (preprocess,)
 
-            if preprocess:
-                if not isinstance(preprocess, (list, tuple)):
-                    preprocess = (preprocess,)
+            steps = []
+            key = ()
 
-                for processor in preprocess:
-                    regex = processor.get('regex')
+            for processor in preprocess:
+                key += (id(processor),)
+                steps.append((key, preprocessor(processor)))
 
-                    if regex:
-                        line = regex.sub(processor.get('replace', ''), line)
+            groups = check.get('showPositionForGroup')
 
-                    fnct = processor.get('function')
+            if groups is not None and not isinstance(groups, (list, tuple)):
+                groups = (groups,)
 
-                    if fnct:
-                        line = fnct(line)
+            checks.append((check, regex, check.get('prefilter'), filterSearch, filterPass, steps, key, groups, check.get('id') == 'tabs'))
 
-            regex = check.get('regex')
+        return checks
 
-            if not regex:
+    def run_line_checks(self):
+        originalLine = self.line
+
+        # Preprocessed versions of the line, and their tabs2spaces expansions,
+        # keyed by preprocess chain
+        processed = {(): originalLine}
+        expanded = {}
+
+        for check, regex, prefilter, filterSearch, filterPass, steps, key, groups, isTabs in self.lineChecks:
+            if prefilter is not None and not prefilter(originalLine):
                 continue
 
-            match = regex.search(line)
+            if filterSearch is not None and bool(filterSearch(originalLine)) != filterPass:
+                continue
 
-            if not match:
+            line = processed.get(key)
+
+            if line is None:
+                line = originalLine
+
+                for stepKey, process in steps:
+                    cached = processed.get(stepKey)
+
+                    if cached is None:
+                        cached = processed[stepKey] = process(line)
+
+                    line = cached
+
+            if not regex.search(line):
                 continue
 
             positions = []
-            groups = check.get('showPositionForGroup')
 
-            if (check.get('id') == 'tabs'):
-                line = tabs2spaces(line, positions=positions)
+            if isTabs:
+                tabs2spaces(line, positions=positions)
             elif groups is not None:
-                line = tabs2spaces(line)
+                spaced = expanded.get(key)
 
-                if not isinstance(groups, (list, tuple)):
-                    groups = (groups,)
+                if spaced is None:
+                    spaced = expanded[key] = tabs2spaces(line)
 
-                for match in regex.finditer(line):
+                for match in regex.finditer(spaced):
                     for group in groups:
                         if group > 0:
                             start = match.start(group)
@@ -429,6 +530,9 @@ class LintChecker(object):
         try:
             while True:
                 raw_line = self.sourcefile.next()
+                self.offset += len(raw_line)
+                self.lineEnded = raw_line[-1] == '\n'
+
                 # strip EOL
                 if raw_line[-1] == '\n':  # ... unless this is the last line which might not have a \n.
                     raw_line = raw_line[:-1]
@@ -530,13 +634,23 @@ class LintChecker(object):
         if self.verbose:
             print u'%d: BLOCK COMMENT END' % self.lineNum
 
+    def indented_re(self, template):
+        '''Returns the regex compiled from template for the current identifier indent.'''
+        key = (template, len(self.identifierIndent))
+        regex = self.TEMPLATE_RE_CACHE.get(key)
+
+        if regex is None:
+            regex = self.TEMPLATE_RE_CACHE[key] = re.compile(template % key[1])
+
+        return regex
+
     def balance_pairs(self, squareOpenCount, curlyOpenCount, parenOpenCount):
         # The following lines have to be indented at least as much as the first identifier
         # after the var keyword at the start of the block.
         if self.verbose:
             print "%d: BALANCE BRACKETS: '['=%d, '{'=%d, '('=%d" % (self.lineNum, squareOpenCount, curlyOpenCount, parenOpenCount)
 
-        lineRE = re.compile(self.INDENTED_EXPRESSION_RE_TEMPLATE % len(self.identifierIndent))
+        lineRE = self.indented_re(self.INDENTED_EXPRESSION_RE_TEMPLATE)
 
         while True:
             # If the expression has open brackets and is terminated, it's an error
@@ -656,7 +770,7 @@ class LintChecker(object):
 
         # Now construct an RE that will match any lines indented at least as much
         # as the var keyword that started the block.
-        blockRE = re.compile(self.VAR_BLOCK_RE_TEMPLATE % len(self.identifierIndent))
+        blockRE = self.indented_re(self.VAR_BLOCK_RE_TEMPLATE)
 
         while self.next_statement(expect_line=not blockHasSemicolon):
 
@@ -717,9 +831,24 @@ class LintChecker(object):
         lastStatementWasVar = False
         lastVarWasSingle = False
         haveLine = True
+        nextCheckpointLineNum = self.CHECKPOINT_INTERVAL
+
+        if self.checkpoint is not None:
+            # Resume from a checkpoint of a previous check, see lint_text
+            self.offset, self.lineNum, lastStatementWasVar, lastVarWasSingle, errorCount = self.checkpoint
+            self.sourcefile.seek(self.offset)
+            self.checkpoint = None
+            haveLine = False
+            nextCheckpointLineNum = self.lineNum + self.CHECKPOINT_INTERVAL
 
         while True:
             if not haveLine:
+                # Between top level statements the state of the check is a few values,
+                # keep it so that the check can resume from here after an edit below.
+                if self.lineNum >= nextCheckpointLineNum and self.lineEnded:
+                    self.checkpoints.append((self.offset, self.lineNum, lastStatementWasVar, lastVarWasSingle, len(self.errors)))
+                    nextCheckpointLineNum = self.lineNum + self.CHECKPOINT_INTERVAL
+
                 haveLine = self.next_statement()
 
             if not self.is_statement():
@@ -773,21 +902,24 @@ class LintChecker(object):
         for check in self.fileChecklist:
             self.sourcefile.seek(0)
             self.lineNum = 0
+            self.offset = 0
+            self.lineEnded = True
 
             if self.verbose:
                 print u'%s: %s' % (check['title'], self.sourcefile.name)
 
             check['action']()
 
-    def lint(self, filesToCheck):
+    def collect_files(self, filesToCheck):
         # Recursively walk any directories and eliminate duplicates
         self.filesToCheck = []
+        seen = set()
 
         for filename in filesToCheck:
             filename = unicode(filename, 'utf-8')
             fullpath = os.path.join(self.basedir, filename)
 
-            if fullpath not in self.filesToCheck:
+            if fullpath not in seen:
                 if os.path.isdir(fullpath):
                     for root, dirs, files in os.walk(fullpath):
                         for skipDir in self.DIRS_TO_SKIP:
@@ -800,30 +932,103 @@ class LintChecker(object):
 
                             fullpath = os.path.join(root, filename)
 
-                            if fullpath not in self.filesToCheck:
+                            if fullpath not in seen:
+                                seen.add(fullpath)
                                 self.filesToCheck.append(fullpath)
                 else:
+                    seen.add(fullpath)
                     self.filesToCheck.append(fullpath)
 
-        for filename in self.filesToCheck:
-            try:
-                with open(filename) as self.sourcefile:
-                    self.filename = relative_path(self.basedir, filename)
-                    self.run_file_checks()
+    def lint_file(self, filename):
+        self.filename = relative_path(self.basedir, filename)
+
+        try:
+            with open(filename) as self.sourcefile:
+                self.run_file_checks()
 
-            except IOError:
-                self.lineNum = 0
-                self.line = None
-                self.error('file not found', type=self.ERROR_TYPE_ILLEGAL)
+        except IOError:
+            self.lineNum = 0
+            self.line = None
+            self.error('file not found', type=self.ERROR_TYPE_ILLEGAL)
 
-            except StopIteration:
-                if self.verbose:
-                    print u'EOF\n'
-                pass
+        except StopIteration:
+            if self.verbose:
+                print u'EOF\n'
+            pass
+
+    def lint(self, filesToCheck, jobs=1, on_file=None):
+        """
+        Lint the files and directories in filesToCheck. Each file is checked by
+        its own checker, in a pool of jobs processes (0 means one per CPU), and
+        on_file(filename, errors) is called as each file's errors come in, in
+        the order the files are done. With jobs != 1, the settings must be
+        picklable.
+        """
+
+        start = time.time()
+        self.collect_files(filesToCheck)
+        tasks = [(self.basedir, filename, self.varDeclarations, self.verbose, self.settings) for filename in self.filesToCheck]
+        pool = None
+
+        if jobs != 1 and len(tasks) > 1:
+            # Only the command line lints several files, the editor never loads this
+            import multiprocessing
+
+            pool = multiprocessing.Pool(jobs or None)
+            results = pool.imap_unordered(check_file, tasks)
+        else:
+            results = itertools.imap(check_file, tasks)
+
+        lineCount = 0
+        found = {}
+
+        try:
+            for filename, errors, lines in results:
+                lineCount += lines
+                found[filename] = errors
+
+                if on_file:
+                    on_file(filename, errors)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        # Errors are kept in the order of the files, whichever was done first
+        for filename in self.filesToCheck:
+            errors = found.get(filename, [])
+            self.errors.extend(errors)
+
+            for error in errors:
+                if error['filename'] not in self.errorFileIndex:
+                    self.errorFileIndex.add(error['filename'])
+                    self.errorFiles.append(error['filename'])
+
+        illegalCount = len([error for error in self.errors if error['type'] == self.ERROR_TYPE_ILLEGAL])
+
+        self.stats = {
+            'files': len(self.filesToCheck),
+            'lines': lineCount,
+            'errors': illegalCount,
+            'warnings': len(self.errors) - illegalCount,
+            'errorFiles': len(self.errorFiles),
+            'seconds': time.time() - start,
+        }
 
-    def lint_text(self, text, filename="<stdin>"):
+    def lint_text(self, text, filename="<stdin>", resume=None, unchanged=None):
+        '''Checks text and returns the errors.
+
+           resume is the resume_state() of a checker that checked a previous version
+           of the same file with the same settings. Errors found before the last
+           checkpoint preceding the first change are reused, and the text is only
+           checked from there. unchanged is an offset in text up to which it is
+           believed not to have changed since, if known.'''
         self.filename = filename
         self.filesToCheck = []
+        self.text = text
+
+        if resume is not None:
+            self.resume_from(*resume, unchanged=unchanged)
 
         try:
             self.sourcefile = cStringIO.StringIO(text)
@@ -835,6 +1040,41 @@ class LintChecker(object):
 
         return self.errors
 
+    def resume_state(self):
+        return (self.text, self.checkpoints, self.errors)
+
+    def resume_from(self, text, checkpoints, errors, unchanged=None):
+        # Find the last checkpoint before the first change with a binary search,
+        # the text up to a checkpoint is unchanged for all the checkpoints before it.
+        low, high = 0, len(checkpoints)
+
+        # The checkpoints up to where the text is believed unchanged are checked at once
+        if unchanged is not None:
+            index = bisect.bisect_right([checkpoint[0] for checkpoint in checkpoints], unchanged)
+
+            if index and self.text[:checkpoints[index - 1][0]] == text[:checkpoints[index - 1][0]]:
+                low = index
+
+        while low < high:
+            middle = (low + high) // 2
+            offset = checkpoints[middle][0]
+
+            if self.text[:offset] == text[:offset]:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low == 0:
+            return
+
+        self.checkpoints = checkpoints[:low]
+        self.checkpoint = checkpoints[low - 1]
+        self.errors = errors[:self.checkpoint[-1]]
+
+        if self.errors:
+            self.errorFileIndex.add(self.filename)
+            self.errorFiles.append(self.filename)
+
     def count_files_checked(self):
         return len(self.filesToCheck)
 
@@ -859,7 +1099,8 @@ class LintChecker(object):
 
         self.errors.append(info)
 
-        if self.filename not in self.errorFiles:
+        if self.filename not in self.errorFileIndex:
+            self.errorFileIndex.add(self.filename)
             self.errorFiles.append(self.filename)
 
     def has_errors(self):
@@ -891,22 +1132,29 @@ class LintChecker(object):
         sys.stdout.write(':\n\n')
 
         for error in self.errors:
-            if 'lineNum' in error and 'line' in error:
-                sys.stdout.write(template.substitute(error).encode('utf-8'))
+            self.print_text_error(error, template)
 
-                if error.get('positions'):
-                    markers = ' ' * len(error['line'])
+    def print_text_error(self, error, template=TEXT_ERROR_MULTI_FILE_TEMPLATE):
+        if 'lineNum' in error and 'line' in error:
+            sys.stdout.write(template.substitute(error).encode('utf-8'))
 
-                    for position in error['positions']:
-                        markers = markers[:position] + '^' + markers[position + 1:]
+            if error.get('positions'):
+                markers = ' ' * len(error['line'])
 
-                    # Add a space at the beginning of the markers to account for the '+' at the beginning
-                    # of the source line.
-                    sys.stdout.write(' %s\n' % markers)
-            else:
-                sys.stdout.write('%s: %s.\n' % (error['filename'], error['message']))
+                for position in error['positions']:
+                    markers = markers[:position] + '^' + markers[position + 1:]
+
+                # Add a space at the beginning of the markers to account for the '+' at the beginning
+                # of the source line.
+                sys.stdout.write(' %s\n' % markers)
+        else:
+            sys.stdout.write('%s: %s.\n' % (error['filename'], error['message']))
 
-            sys.stdout.write('\n')
+        sys.stdout.write('\n')
+
+    def print_stats(self):
+        if self.stats:
+            sys.stderr.write('%(files)d files (%(lines)d lines) checked in %(seconds).1f s: %(errors)d errors and %(warnings)d warnings in %(errorFiles)d files\n' % self.stats)
 
     def print_textmate_html_errors(self):
         html = """
@@ -1086,6 +1334,8 @@ if __name__ == '__main__':
     parser.add_option('-b', '--basedir', action='store', type='string', dest='basedir', help='the base directory relative to which filenames are resolved, defaults to the current working directory')
     parser.add_option('-d', '--var-declarations', action='store', type='string', dest='var_declarations', default='single', help='set the policy for flagging consecutive var declarations (%s)' % ', '.join(LintChecker.VAR_DECLARATIONS))
     parser.add_option('-v', '--verbose', action='store_true', dest='verbose', default=False, help='show what lint is doing')
+    parser.add_option('-j', '--jobs', action='store', type='int', dest='jobs', default=0, help='the number of processes checking files, defaults to the number of CPUs')
+    parser.add_option('-s', '--stats', action='store_true', dest='stats', default=False, help='show how many files, lines and errors were checked and found, and how long it took')
     parser.add_option('-q', '--quiet', action='store_true', dest='quiet', default=False, help='do not display errors, only return an exit code')
 
     (options, args) = parser.parse_args()
@@ -1138,10 +1388,24 @@ if __name__ == '__main__':
 
         sys.exit(0)
 
-    checker.lint(pathsToCheck)
+    # With several files, text reports are written file by file as soon as each is checked
+    stream = options.format == 'text' and not options.quiet and not (len(pathsToCheck) == 1 and pathsToCheck[0].endswith('.j'))
+
+    def print_file_errors(filename, errors):
+        for error in errors:
+            checker.print_text_error(error)
+
+        sys.stdout.flush()
+
+    checker.lint(pathsToCheck, jobs=options.jobs, on_file=print_file_errors if stream else None)
+
+    if options.stats:
+        checker.print_stats()
 
     if checker.has_errors():
-        if not options.quiet:
+        if stream:
+            sys.stdout.write('%d error%s in %d files.\n' % (len(checker.errors), 's' if len(checker.errors) > 1 else '', len(checker.errorFiles)))
+        elif not options.quiet:
             checker.print_errors(options.format)
 
         sys.exit(1)
@@ -2,9 +2,11 @@
 /*globals LINTER_PATH, load */
 
 var CSSLint = require("./csslint-node").CSSLint;
+var LintResults = require("../lint_results").LintResults;
 
+// The results are written in a compact form, see ../lint_results.js
 exports.lint = function (code, config) {
-    var results = [];
+    var results = new LintResults();
 
     var ruleset = {};
 
@@ -34,15 +36,10 @@ exports.lint = function (code, config) {
 
             // We don't pass on the rollup messages
             if (message.rollup !== true) {
-                results.push({
-                    'line': message.line,
-                    'character': message.col,
-                    'type': message.type,
-                    'reason': message.message
-                });
+                results.add(message.line, message.col, message.type === 'warning' ? 1 : 0, message.rule && message.rule.id, message.message);
             }
         }
     });
 
-    return results;
+    return results.compact();
 };
@@ -2,10 +2,12 @@
 /*globals LINTER_PATH load */
 
 var JSHINT = require("./jshint").JSHINT;
+var LintResults = require("../lint_results").LintResults;
 
+// The results are written in a compact form, see ../lint_results.js
 exports.lint = function (code, config) {
     var globals,
-        results = [];
+        results = new LintResults();
 
     if (config.globals) {
         globals = config.globals;
@@ -15,14 +17,14 @@ exports.lint = function (code, config) {
     try {
         JSHINT(code, config, globals);
     } catch (e) {
-        results.push({line: 1, character: 1, reason: e.message});
+        results.add(1, 1, 0, null, e.message);
     } finally {
         JSHINT.errors.forEach(function (error) {
             if (error) {
-                results.push(error);
+                results.add(error.line, error.character, error.code && error.code.charAt(0) === "E" ? 0 : 1, error.code, error.reason);
             }
         });
     }
 
-    return results;
+    return results.compact();
 };
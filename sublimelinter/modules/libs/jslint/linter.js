@@ -2,21 +2,23 @@
 /*globals LINTER_PATH, load */
 
 var JSLINT = require("./jslint").JSLINT;
+var LintResults = require("../lint_results").LintResults;
 
+// The results are written in a compact form, see ../lint_results.js
 exports.lint = function (code, config) {
-    var results = [];
+    var results = new LintResults();
 
     try {
         JSLINT(code, config);
     } catch (e) {
-        results.push({line: 1, character: 1, reason: e.message});
+        results.add(1, 1, 0, null, e.message);
     } finally {
         JSLINT.errors.forEach(function (error) {
             if (error) {
-                results.push(error);
+                results.add(error.line, error.character, 0, error.code, error.reason);
             }
         });
     }
 
-    return results;
+    return results.compact();
 };
@@ -0,0 +1,32 @@
+/*jshint node: true */
+
+// Lint results in the compact form written by the linter.js adapters:
+//   {"messages": [message, ...], "results": [[line, character, severity, code, message index], ...]}
+// severity is 0 for errors and 1 for warnings, each message is written once.
+//
+// Adapters get it with require("../lint_results"): in node as a module, with
+// jsc as a global, since its require() loads the file into the global scope.
+var LintResults = function () {
+    this.messages = [];
+    this.messageIds = {};
+    this.results = [];
+};
+
+LintResults.prototype.add = function (line, character, severity, code, reason) {
+    var key = "$" + reason;
+
+    if (!this.messageIds.hasOwnProperty(key)) {
+        this.messageIds[key] = this.messages.length;
+        this.messages.push(reason);
+    }
+
+    this.results.push([line || 1, character || 1, severity, code || null, this.messageIds[key]]);
+};
+
+LintResults.prototype.compact = function () {
+    return {messages: this.messages, results: this.results};
+};
+
+if (typeof exports === "object" && exports) {
+    exports.LintResults = LintResults;
+}
@@ -205,6 +205,12 @@ class ModuleScope(Scope):
 _MAGIC_GLOBALS = ['__file__', '__builtins__', 'WindowsError']
 
 
+# Parsed doctest examples, keyed by docstring.  Cleared once it reaches
+# _DOCTEST_CACHE_SIZE entries.
+_doctestExamplesCache = {}
+_DOCTEST_CACHE_SIZE = 1000
+
+
 def getNodeName(node):
     # Returns node.id, or node.name, or None
     if hasattr(node, 'id'):     # One of the many nodes with an id
@@ -237,7 +243,8 @@ class Checker(object):
         builtIns.update(_customBuiltIns.split(','))
     del _customBuiltIns
 
-    def __init__(self, tree, filename='(none)', builtins=None):
+    def __init__(self, tree, filename='(none)', builtins=None,
+                 withDoctest=None):
         self._nodeHandlers = {}
         self._deferredFunctions = []
         self._deferredAssignments = []
@@ -246,6 +253,8 @@ class Checker(object):
         self.filename = filename
         if builtins:
             self.builtIns = self.builtIns.union(builtins)
+        if withDoctest is not None:
+            self.withDoctest = withDoctest
         self.scopeStack = [ModuleScope()]
         self.exceptHandlers = [()]
         self.futuresAllowed = True
@@ -560,12 +569,27 @@ class Checker(object):
 
     _getDoctestExamples = doctest.DocTestParser().get_examples
 
+    def getDoctestExamples(self, docstring):
+        """
+        Return the doctest examples of C{docstring}, parsing each distinct
+        docstring only once.
+        """
+        try:
+            return _doctestExamplesCache[docstring]
+        except KeyError:
+            pass
+        examples = self._getDoctestExamples(docstring)
+        if len(_doctestExamplesCache) >= _DOCTEST_CACHE_SIZE:
+            _doctestExamplesCache.clear()
+        _doctestExamplesCache[docstring] = examples
+        return examples
+
     def handleDoctests(self, node):
         try:
             docstring, node_lineno = self.getDocstring(node.body[0])
             if not docstring:
                 return
-            examples = self._getDoctestExamples(docstring)
+            examples = self.getDoctestExamples(docstring)
         except (ValueError, IndexError):
             # e.g. line 6 of the docstring for <string> has inconsistent
             # leading whitespace: ...
@@ -0,0 +1,172 @@
+'''pylint_worker.py
+
+Long-lived pylint engine used by SublimeLinter's pylint linter.
+It is run in a separate Python process; requests are read from stdin and
+responses are written to stdout, one JSON object per line:
+
+    request:  {"filename": "/path/to/file.py", "code": "..."}
+    response: {"messages": [[line, column, msg_id, message], ...]}
+              {"error": "..."}
+
+A {"ready": true} line (or an error) is written once pylint has been
+imported and its checkers initialized. The checkers and astroid's module
+cache are kept between requests, so only the linted source is rebuilt.
+'''
+
+import json
+import os
+import sys
+import tempfile
+import traceback
+
+# Anything printed by pylint or the code it imports would corrupt the protocol
+OUTPUT = sys.stdout
+sys.stdout = sys.stderr
+
+# Arguments passed to pylint, same as when it used to run in process
+PYLINT_ARGS = [
+    '--module-rgx=.*',  # don't check the module name
+    '--reports=n',      # remove tables
+    '--persistent=n',   # don't save the old score (no sense for temp)
+]
+
+
+def respond(response):
+    OUTPUT.write(json.dumps(response) + '\n')
+    OUTPUT.flush()
+
+
+try:
+    from pylint import checkers
+    from pylint import lint
+    from pylint.reporters import BaseReporter
+except ImportError:
+    respond({'error': 'the pylint module could not be imported'})
+    sys.exit(1)
+
+
+class MessageCollector(BaseReporter):
+    '''Collects pylint messages as [line, column, msg_id, message] lists.'''
+    name = 'sublimelinter'
+
+    def __init__(self):
+        BaseReporter.__init__(self)
+        self.messages = []
+
+    def add_message(self, msg_id, location, msg):
+        # pylint < 1.2
+        self.messages.append([location[3], location[4], msg_id, msg])
+
+    def handle_message(self, msg):
+        # pylint >= 1.2
+        self.messages.append([msg.line, msg.column, msg.msg_id, msg.msg])
+
+    def display_results(self, *args):
+        pass
+
+    def _display(self, layout):
+        pass
+
+
+class Engine(object):
+    '''A pylint linter with initialized checkers, reused for every request.'''
+
+    def __init__(self):
+        self.reporter = MessageCollector()
+        self.linter = lint.PyLinter(reporter=self.reporter)
+        checkers.initialize(self.linter)
+        self.linter.load_command_line_configuration(PYLINT_ARGS)
+        self.in_memory = True
+
+    def check(self, filename, code):
+        del self.reporter.messages[:]
+
+        if self.in_memory:
+            try:
+                self.check_in_memory(filename, code)
+            except (AttributeError, ImportError, TypeError):
+                # This pylint's internals don't match what we expect,
+                # go through a temp file from now on.
+                self.in_memory = False
+                del self.reporter.messages[:]
+
+        if not self.in_memory:
+            self.check_temp_file(code)
+
+        return self.reporter.messages
+
+    def check_in_memory(self, filename, code):
+        '''Builds the astroid module from code and runs the checkers on it,
+           the same way PyLinter.check does for modules on disk.'''
+        from astroid import MANAGER
+        from astroid.builder import AstroidBuilder
+        from pylint.interfaces import IAstroidChecker, IRawChecker, ITokenChecker
+        from pylint.utils import PyLintASTWalker
+
+        try:
+            from pylint.interfaces import implements
+        except ImportError:
+            from logilab.common.interface import implements
+
+        linter = self.linter
+        path = filename or '<unsaved>'
+        modname = os.path.splitext(os.path.basename(path))[0]
+        module = AstroidBuilder(MANAGER).string_build(code, modname, path)
+
+        walker = PyLintASTWalker(linter)
+        _checkers = linter.prepare_checkers()
+        rawcheckers = [c for c in _checkers if implements(c, IRawChecker)]
+        tokencheckers = [c for c in _checkers if implements(c, ITokenChecker) and c is not linter]
+
+        for checker in _checkers:
+            checker.open()
+
+            if implements(checker, IAstroidChecker):
+                walker.add_checker(checker)
+
+        try:
+            linter.set_current_module(modname, path)
+            linter.check_astroid_module(module, walker, rawcheckers, tokencheckers)
+        finally:
+            for checker in reversed(_checkers):
+                checker.close()
+
+            # Keep imported modules cached, but never the source being edited
+            MANAGER.astroid_cache.pop(modname, None)
+
+    def check_temp_file(self, code):
+        fd, path = tempfile.mkstemp(suffix='.py')
+
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(code.encode('utf-8'))
+
+            self.linter.check(path)
+        finally:
+            os.remove(path)
+
+
+def main():
+    try:
+        engine = Engine()
+    except Exception:
+        respond({'error': traceback.format_exc()})
+        return
+
+    respond({'ready': True})
+
+    while True:
+        line = sys.stdin.readline()
+
+        if not line:
+            break
+
+        try:
+            request = json.loads(line)
+            respond({'messages': engine.check(request.get('filename', ''), request['code'])})
+        except Exception:
+            respond({'error': traceback.format_exc()})
+
+
+if __name__ == '__main__':
+    main()
@@ -4,56 +4,114 @@ Used to highlight user-defined "annotations" such as TODO, README, etc.,
 depending user choice.
 '''
 
+import re
+
 import sublime
 
-from base_linter import BaseLinter
+from base_linter import BaseLinter, get_view_settings
 
 CONFIG = {
     'language': 'Annotations'
 }
 
+# Compiled annotation scanners, keyed by (annotations, whole_words)
+ANNOTATIONS_RE_CACHE = {}
+
+# The last annotations found in a view, keyed by view id: (key, regions);
+# key holds the text itself, so that only the same text can match
+FOUND_CACHE = {}
+FOUND_CACHE_SIZE = 16
+
+
+def get_annotations_regex(annotations, whole_words=False):
+    '''Returns a regex matching any of the annotations in a single pass.
+       Longer annotations are tried first, so that "FIXME" wins over "FIX".'''
+    key = (annotations, whole_words)
+
+    try:
+        return ANNOTATIONS_RE_CACHE[key]
+    except KeyError:
+        pass
+
+    alternation = u'|'.join(re.escape(annotation) for annotation in sorted(set(annotations), key=len, reverse=True))
+
+    if whole_words:
+        pattern = ur'(?<!\w)(?:{0})(?!\w)'.format(alternation)
+    else:
+        pattern = u'(?:{0})'.format(alternation)
+
+    regex = ANNOTATIONS_RE_CACHE[key] = re.compile(pattern, re.UNICODE)
+    return regex
+
 
 class Linter(BaseLinter):
     DEFAULT_NOTES = ["TODO", "README", "FIXME"]
 
     def built_in_check(self, view, code, filename):
-        annotations = self.select_annotations(view)
+        return self.find_annotations(view, code)
+
+    def select_annotations(self, view):
+        '''selects the list of annotations to use'''
+        return get_view_settings(view).get("annotations", self.DEFAULT_NOTES)
+
+    def annotations_regex(self, view):
+        '''returns the regex matching the annotations selected for view'''
+        settings = get_view_settings(view)
+        annotations = tuple(self.select_annotations(view))
+        return get_annotations_regex(annotations, bool(settings.get('annotations_whole_words', False)))
+
+    def find_annotations(self, view, text):
+        '''finds all annotations in text with a single scan and returns them
+           as a sorted list of sublime Regions. The result is reused while the
+           text and settings of the view stay the same.'''
+        settings = get_view_settings(view)
+        annotations = tuple(self.select_annotations(view))
+        whole_words = bool(settings.get('annotations_whole_words', False))
+        comments_only = bool(settings.get('annotations_comments_only', False))
+
+        if not annotations:
+            return []
+
+        vid = view.id()
+        # Which matches are in comments depends on the syntax
+        syntax = settings.get('syntax') if comments_only else None
+        key = (annotations, whole_words, comments_only, syntax, text)
+        cached = FOUND_CACHE.get(vid)
+
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
         regions = []
 
-        for annotation in annotations:
-            regions.extend(self.find_all(code, annotation, view))
+        for match in get_annotations_regex(annotations, whole_words).finditer(text):
+            start = match.start()
 
-        return regions
+            if comments_only and view.score_selector(start, 'comment') <= 0:
+                continue
 
-    def select_annotations(self, view):
-        '''selects the list of annotations to use'''
-        return view.settings().get("annotations", self.DEFAULT_NOTES)
+            regions.append(sublime.Region(start, match.end()))
 
-    def extract_annotations(self, code, view, filename):
-        '''extract all lines with annotations'''
-        annotations = self.select_annotations(view)
-        annotation_starts = []
+        if len(FOUND_CACHE) >= FOUND_CACHE_SIZE:
+            FOUND_CACHE.clear()
 
-        for annotation in annotations:
-            start = 0
-            length = len(annotation)
+        FOUND_CACHE[vid] = (key, regions)
+        return regions
 
-            while True:
-                start = code.find(annotation, start)
+    def extract_annotations(self, code, view, filename):
+        '''extract all lines with annotations'''
+        regions_with_notes = []
 
-                if start != -1:
-                    end = start + length
-                    annotation_starts.append(start)
-                    start = end
-                else:
-                    break
+        for found in self.find_annotations(view, code):
+            # Annotations within a scope already extracted don't need another lookup
+            if regions_with_notes and regions_with_notes[-1].contains(found.begin()):
+                continue
 
-        regions_with_notes = set([])
+            region = view.extract_scope(found.begin())
 
-        for point in annotation_starts:
-            regions_with_notes.add(view.extract_scope(point))
+            if region not in regions_with_notes:
+                regions_with_notes.append(region)
 
-        regions_with_notes = sorted(list(regions_with_notes))
+        regions_with_notes.sort(key=lambda region: region.begin())
         text = []
 
         for region in regions_with_notes:
@@ -62,23 +120,3 @@ class Linter(BaseLinter):
             text.append(view.substr(region))
 
         return '\n'.join(text)
-
-    def find_all(self, text, string, view):
-        ''' finds all occurences of "string" in "text" and notes their positions
-            as a sublime Region
-        '''
-        found = []
-        length = len(string)
-        start = 0
-
-        while True:
-            start = text.find(string, start)
-
-            if start != -1:
-                end = start + length
-                found.append(sublime.Region(start, end))
-                start = end
-            else:
-                break
-
-        return found
@@ -36,17 +36,39 @@
 #
 
 from capp_lint import LintChecker
-from base_linter import BaseLinter
+from base_linter import BaseLinter, get_text_snapshot, get_view_settings
 
 CONFIG = {
     'language': 'Objective-J'
 }
 
+# The state of the last check of a view, keyed by view id: (key, resume state),
+# so that the next check only has to check the text after the first change
+RESUME_STATES = {}
+RESUME_STATES_SIZE = 16
+
 
 class Linter(BaseLinter):
     def built_in_check(self, view, code, filename):
-        checker = LintChecker(view)
-        checker.lint_text(code, filename)
+        settings = get_view_settings(view)
+        checker = LintChecker(view, settings=settings)
+        vid = view.id()
+        key = (filename, settings.fingerprint)
+        previous = RESUME_STATES.get(vid)
+
+        # The start of the edits since the last lint cycle; the resume state
+        # may be older, lint_text checks the text up to there is unchanged.
+        # Offsets in the text are no greater than in its UTF-8 encoding.
+        snapshot = get_text_snapshot(view)
+        dirty = snapshot.dirty_region() if snapshot is not None else None
+
+        checker.lint_text(code, filename, resume=previous[1] if previous is not None and previous[0] == key else None,
+                          unchanged=dirty.begin() if dirty is not None else None)
+
+        if len(RESUME_STATES) >= RESUME_STATES_SIZE and vid not in RESUME_STATES:
+            RESUME_STATES.clear()
+
+        RESUME_STATES[vid] = (key, checker.resume_state())
         return checker.errors
 
     def parse_errors(self, view, errors, lines, errorUnderlines, violationUnderlines, warningUnderlines, errorMessages, violationMessages, warningMessages):
@@ -1,7 +1,7 @@
 import re
 import subprocess
 
-from base_linter import BaseLinter
+from base_linter import BaseLinter, get_view_settings
 
 CONFIG = {
     'language': 'Perl'
@@ -17,7 +17,7 @@ class Linter(BaseLinter):
         self.linter = None
 
     def get_executable(self, view):
-        self.linter = view.settings().get('perl_linter', 'perlcritic')
+        self.linter = get_view_settings(view).get('perl_linter', 'perlcritic')
 
         if self.linter == 'perl':
             linter_name = 'Perl'
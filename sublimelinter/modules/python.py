@@ -39,13 +39,16 @@
 # TODO:
 # * fix regex for variable names inside strings (quotes)
 
+import difflib
+import os
 import re
+import subprocess
 import _ast
 
 import pep8
 import pyflakes.checker as pyflakes
 
-from base_linter import BaseLinter
+from base_linter import BaseLinter, get_view_settings
 
 pyflakes.messages.Message.__str__ = lambda self: self.message % self.message_args
 
@@ -53,11 +56,266 @@ CONFIG = {
     'language': 'Python'
 }
 
+# pyflakes builtins extended with a given pyflakes_ignore list, keyed by the
+# ignore list as a tuple. The sets are frozen so they can be shared between
+# concurrent lint jobs.
+BUILTINS_CACHE = {}
+BUILTINS_CACHE_SIZE = 16
+
+
+def get_builtins(ignore):
+    '''Returns the frozen set of pyflakes builtins extended with the names in ignore.'''
+    key = tuple(ignore)
+
+    try:
+        return BUILTINS_CACHE[key]
+    except KeyError:
+        if len(BUILTINS_CACHE) >= BUILTINS_CACHE_SIZE:
+            BUILTINS_CACHE.clear()
+
+        builtins = BUILTINS_CACHE[key] = frozenset(pyflakes.Checker.builtIns.union(ignore))
+        return builtins
+
+
+class Checker(pyflakes.Checker):
+    '''A pyflakes Checker that uses the given builtins as they are: pyflakes
+       would make their union with its own builtins on each check, which
+       get_builtins already includes.'''
+
+    def __init__(self, tree, filename, builtins=None, withDoctest=None):
+        if builtins is not None:
+            self.builtIns = builtins
+
+        super(Checker, self).__init__(tree, filename, withDoctest=withDoctest)
+
+
+# Names bound at the top level of a module, found by a scan of its lines
+# rather than by parsing it: definitions, assignments and imports
+TOP_LEVEL_DEFINITION_RE = re.compile(r'^(?:def|class)\s+(\w+)', re.M)
+TOP_LEVEL_ASSIGNMENT_RE = re.compile(r'^(\w+(?:\s*,\s*\w+)*)\s*=(?!=)', re.M)
+TOP_LEVEL_IMPORT_RE = re.compile(r'^(?:from\s+[\w.]+\s+)?import\s+([^#;\n]+)', re.M)
+
+# pyflakes messages about the top level of a module that can't be told from a
+# region of it linted on its own, as the names may be used or defined in the
+# rest of the module
+REGION_UNRELIABLE_MESSAGES = (pyflakes.messages.UnusedImport, pyflakes.messages.UndefinedExport)
+
+
+def top_level_names(text):
+    '''Returns the set of names bound at the top level of the module text.'''
+    names = set(TOP_LEVEL_DEFINITION_RE.findall(text))
+
+    for targets in TOP_LEVEL_ASSIGNMENT_RE.findall(text):
+        names.update(target.strip() for target in targets.split(','))
+
+    for imports in TOP_LEVEL_IMPORT_RE.findall(text):
+        for name in imports.strip().strip('()\\').split(','):
+            name = name.split()
+
+            if len(name) == 3 and name[1] == 'as':
+                names.add(name[2])
+            elif name and name[0] != '*':
+                names.add(name[0].split('.')[0])
+
+    return names
+
+
+# Templates used to locate the word to underline for pyflakes messages
+# that do not carry an exact column. {0} is replaced by the escaped word.
+UNDERLINE_WORD_TEMPLATE = r'((and|or|not|if|elif|while|in)\s+|[+\-*^%%<>=\(\{{])*\s*(?P<underline>[\w\.]*{0}[\w]*)'
+UNDERLINE_IMPORT_TEMPLATE = r'(^|\s+|,\s*|as\s+)(?P<underline>[\w]*{0}[\w]*)'
+UNDERLINE_FOR_VAR_TEMPLATE = r'for\s+(?P<underline>[\w]*{0}[\w*])'
+UNDERLINE_DUPLICATE_ARGUMENT_TEMPLATE = r'def [\w_]+\(.*?(?P<underline>[\w]*{0}[\w]*)'
+UNDERLINE_IMPORT_LINE_RE = re.compile(r'(from\s+[\w_\.]+\s+)?import\s+(?P<match>[^#;]+)')
+
+# Compiled underline regexes, keyed by (template, word)
+UNDERLINE_RE_CACHE = {}
+UNDERLINE_RE_CACHE_SIZE = 256
+
+
+def get_underline_regex(template, word):
+    '''Returns the compiled regex for template with word filled in.'''
+    key = (template, word)
+
+    try:
+        return UNDERLINE_RE_CACHE[key]
+    except KeyError:
+        if len(UNDERLINE_RE_CACHE) >= UNDERLINE_RE_CACHE_SIZE:
+            UNDERLINE_RE_CACHE.clear()
+
+        regex = UNDERLINE_RE_CACHE[key] = re.compile(template.format(re.escape(word)))
+        return regex
+
+
+# The committed (or saved) text of a file used as the base of the diff
+# in changed lines mode, keyed by filename: (mtime, HEAD revision, text)
+BASE_TEXT_CACHE = {}
+
+
+def run_git(args, dirname, startupinfo=None):
+    '''Returns the output of git with args in dirname, or None if it failed.'''
+    try:
+        process = subprocess.Popen(['git'] + args,
+                                   cwd=dirname,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   startupinfo=startupinfo)
+        output = process.communicate()[0]
+    except OSError:
+        return None
+
+    return output if process.returncode == 0 else None
+
+
+# The HEAD revision of each git directory, keyed by its path: (stamp, revision),
+# see get_head_stamp
+HEAD_REVISION_CACHE = {}
+
+
+def find_git_dir(dirname):
+    '''Returns the git directory of the repository dirname is in, or None.'''
+    while True:
+        path = os.path.join(dirname, '.git')
+
+        if os.path.isdir(path):
+            return path
+        elif os.path.isfile(path):
+            # A worktree or a submodule: .git names its git directory
+            try:
+                with open(path) as f:
+                    line = f.readline().strip()
+            except IOError:
+                return None
+
+            if line.startswith('gitdir:'):
+                return os.path.normpath(os.path.join(dirname, line[len('gitdir:'):].strip()))
+
+            return None
+
+        parent = os.path.dirname(dirname)
+
+        if parent == dirname:
+            return None
+
+        dirname = parent
+
+
+def get_head_stamp(git_dir):
+    '''Returns what HEAD points to and the modification times of the files it
+       is read from, which change with each commit or checkout.'''
+    head = os.path.join(git_dir, 'HEAD')
+
+    try:
+        with open(head) as f:
+            content = f.read().strip()
+    except IOError:
+        return None
+
+    paths = [head]
+
+    if content.startswith('ref:'):
+        # The refs of a worktree are kept in the common git directory
+        common_dir = git_dir
+
+        try:
+            with open(os.path.join(git_dir, 'commondir')) as f:
+                common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+        except IOError:
+            pass
+
+        paths.append(os.path.join(common_dir, *content[len('ref:'):].strip().split('/')))
+        paths.append(os.path.join(common_dir, 'packed-refs'))
+
+    stamp = [content]
+
+    for path in paths:
+        try:
+            stamp.append(os.path.getmtime(path))
+        except OSError:
+            stamp.append(None)
+
+    return tuple(stamp)
+
+
+def get_head_revision(dirname, startupinfo=None):
+    '''Returns the HEAD revision of the repository dirname is in, or None;
+       git is only run when HEAD or the ref it points to changed.'''
+    git_dir = find_git_dir(dirname)
+
+    if git_dir is None:
+        return None
+
+    stamp = get_head_stamp(git_dir)
+    cached = HEAD_REVISION_CACHE.get(git_dir)
+
+    if stamp is not None and cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    revision = run_git(['rev-parse', 'HEAD'], dirname, startupinfo)
+    HEAD_REVISION_CACHE[git_dir] = (stamp, revision)
+    return revision
+
+
+def get_base_text(filename, startupinfo=None):
+    '''Returns the text of filename at git HEAD, falling back to the copy
+       saved on disk if the file is not tracked by git.'''
+    try:
+        mtime = os.path.getmtime(filename)
+    except OSError:
+        return None
+
+    dirname, basename = os.path.split(filename)
+
+    # A commit or checkout changes HEAD without touching the file
+    revision = get_head_revision(dirname, startupinfo)
+    cached = BASE_TEXT_CACHE.get(filename)
+
+    if cached is not None and cached[:2] == (mtime, revision):
+        return cached[2]
+
+    text = None
+
+    if revision is not None:
+        text = run_git(['show', 'HEAD:./{0}'.format(basename)], dirname, startupinfo)
+
+    if text is None:
+        try:
+            with open(filename, 'rb') as f:
+                text = f.read()
+        except IOError:
+            return None
+
+    BASE_TEXT_CACHE[filename] = (mtime, revision, text)
+    return text
+
+
+def get_changed_lines(base, code):
+    '''Returns the set of one-based line numbers in code that were added
+       or changed relative to base, as computed by pep8.parse_udiff.'''
+    # Without a final newline, the last line of a hunk would run into the
+    # next line of the diff, which parse_udiff would then misread
+    if not base.endswith('\n'):
+        base += '\n'
+
+    if not code.endswith('\n'):
+        code += '\n'
+
+    diff = difflib.unified_diff(base.splitlines(True), code.splitlines(True), 'a/code', 'b/code', n=0)
+    selected = pep8.parse_udiff(''.join(diff), parent='')
+    return selected.get('code', set())
+
 
 class PythonLintError(pyflakes.messages.Message):
 
     def __init__(self, filename, loc, level, message, message_args, offset=None, text=None):
-        super(PythonLintError, self).__init__(filename, loc)
+        if isinstance(loc, int):
+            # pep8 reports plain line numbers rather than AST nodes
+            self.filename = filename
+            self.lineno = loc
+            self.col = 0
+        else:
+            super(PythonLintError, self).__init__(filename, loc)
+
         self.level = level
         self.message = message
         self.message_args = message_args
@@ -96,7 +354,7 @@ class PythonError(PythonLintError):
 
 
 class Linter(BaseLinter):
-    def pyflakes_check(self, code, filename, ignore=None):
+    def pyflakes_check(self, code, filename, ignore=None, doctests=True, names=None):
         try:
             tree = compile(code, filename, "exec", _ast.PyCF_ONLY_AST)
         except (SyntaxError, IndentationError), value:
@@ -129,18 +387,19 @@ class Linter(BaseLinter):
             return [PythonError(filename, 0, e.args[0])]
         else:
             # Okay, it's syntactically valid.  Now check it.
-            if ignore is not None:
-                old_magic_globals = pyflakes._MAGIC_GLOBALS
-                pyflakes._MAGIC_GLOBALS += ignore
-
-            w = pyflakes.Checker(tree, filename)
+            # Pass the ignored names as per-call builtins rather than touching
+            # pyflakes' module globals, so concurrent checks don't interfere.
+            builtins = get_builtins(ignore) if ignore else None
 
-            if ignore is not None:
-                pyflakes._MAGIC_GLOBALS = old_magic_globals
+            # Names defined outside of the linted code change with each edit,
+            # they are not worth caching
+            if names:
+                builtins = (builtins or pyflakes.Checker.builtIns).union(names)
 
+            w = Checker(tree, filename, builtins=builtins, withDoctest=doctests)
             return w.messages
 
-    def pep8_check(self, code, filename, ignore=None):
+    def pep8_check(self, code, filename, ignore=None, selected_lines=None):
         messages = []
         _lines = code.split('\n')
 
@@ -148,6 +407,10 @@ class Linter(BaseLinter):
             class SublimeLinterReport(pep8.BaseReport):
                 def error(self, line_number, offset, text, check):
                     """Report an error, according to options."""
+                    # Same as pep8.DiffReport: only report changed lines
+                    if selected_lines is not None and line_number not in selected_lines:
+                        return
+
                     code = text[:4]
                     message = text[5:]
 
@@ -191,41 +454,97 @@ class Linter(BaseLinter):
 
         return messages
 
+    def is_cacheable(self, view):
+        # In changed lines mode, the result also depends on the base version of the file
+        return not get_view_settings(view).get('python_changed_lines_only', False)
+
+    def get_selected_lines(self, view, code, filename):
+        '''Returns the set of lines to report in changed lines mode,
+           or None if every line should be reported.'''
+        if not filename or not get_view_settings(view).get('python_changed_lines_only', False):
+            return None
+
+        base = get_base_text(filename, self.get_startupinfo())
+
+        if base is None:
+            return None
+
+        full_text = getattr(view, 'full_text', None)
+
+        if full_text is not None:
+            # A region of a huge file (see region_lint.py): compare the whole
+            # file, and number the changed lines from the start of the region
+            changed = get_changed_lines(base, full_text.encode('utf-8'))
+            return set(line - view.first_row for line in changed if line > view.first_row)
+
+        return get_changed_lines(base, code)
+
     def built_in_check(self, view, code, filename):
         errors = []
+        settings = get_view_settings(view)
+        selected_lines = self.get_selected_lines(view, code, filename)
 
-        if view.settings().get("pep8", True):
-            errors.extend(self.pep8_check(code, filename, ignore=view.settings().get('pep8_ignore', [])))
+        if selected_lines is not None and not selected_lines:
+            return errors
 
-        pyflakes_ignore = view.settings().get('pyflakes_ignore', None)
-        pyflakes_disabled = view.settings().get('pyflakes_disabled', False)
+        if settings.get("pep8", True):
+            errors.extend(self.pep8_check(code, filename, ignore=settings.get('pep8_ignore', []), selected_lines=selected_lines))
+
+        pyflakes_ignore = settings.get('pyflakes_ignore', None)
+        pyflakes_disabled = settings.get('pyflakes_disabled', False)
+        pyflakes_doctests = settings.get('pyflakes_doctests', True)
 
         if not pyflakes_disabled:
-            errors.extend(self.pyflakes_check(code, filename, pyflakes_ignore))
+            full_text = getattr(view, 'full_text', None)
+
+            if full_text is not None:
+                # A region of a huge file: the rest of the module defines names
+                messages = self.pyflakes_check(code, filename, pyflakes_ignore, pyflakes_doctests, top_level_names(full_text))
+                lines = code.splitlines()
+                messages = [message for message in messages if not isinstance(message, REGION_UNRELIABLE_MESSAGES)
+                            or lines[message.lineno - 1:message.lineno] and lines[message.lineno - 1][:1].isspace()]
+            else:
+                messages = self.pyflakes_check(code, filename, pyflakes_ignore, pyflakes_doctests)
+
+            if selected_lines is not None:
+                messages = [message for message in messages if message.lineno in selected_lines]
+
+            errors.extend(messages)
 
         return errors
 
     def parse_errors(self, view, errors, lines, errorUnderlines, violationUnderlines, warningUnderlines, errorMessages, violationMessages, warningMessages):
 
+        def underline_name(lineno, col, word, underlines):
+            # pyflakes reports these messages at the Name node itself, so the
+            # column is exact as long as the line text agrees with it.
+            line = view.full_line(view.text_point(lineno - 1, 0))
+
+            if view.substr(line)[col:col + len(word)] != word:
+                return False
+
+            lines.add(lineno - 1)
+            self.underline_range(view, lineno, col, underlines, len(word))
+            return True
+
         def underline_word(lineno, word, underlines):
-            regex = r'((and|or|not|if|elif|while|in)\s+|[+\-*^%%<>=\(\{{])*\s*(?P<underline>[\w\.]*{0}[\w]*)'.format(re.escape(word))
+            regex = get_underline_regex(UNDERLINE_WORD_TEMPLATE, word)
             self.underline_regex(view, lineno, regex, lines, underlines, word)
 
         def underline_import(lineno, word, underlines):
-            linematch = '(from\s+[\w_\.]+\s+)?import\s+(?P<match>[^#;]+)'
-            regex = '(^|\s+|,\s*|as\s+)(?P<underline>[\w]*{0}[\w]*)'.format(re.escape(word))
-            self.underline_regex(view, lineno, regex, lines, underlines, word, linematch)
+            regex = get_underline_regex(UNDERLINE_IMPORT_TEMPLATE, word)
+            self.underline_regex(view, lineno, regex, lines, underlines, word, UNDERLINE_IMPORT_LINE_RE)
 
         def underline_for_var(lineno, word, underlines):
-            regex = 'for\s+(?P<underline>[\w]*{0}[\w*])'.format(re.escape(word))
+            regex = get_underline_regex(UNDERLINE_FOR_VAR_TEMPLATE, word)
             self.underline_regex(view, lineno, regex, lines, underlines, word)
 
         def underline_duplicate_argument(lineno, word, underlines):
-            regex = 'def [\w_]+\(.*?(?P<underline>[\w]*{0}[\w]*)'.format(re.escape(word))
+            regex = get_underline_regex(UNDERLINE_DUPLICATE_ARGUMENT_TEMPLATE, word)
             self.underline_regex(view, lineno, regex, lines, underlines, word)
 
         errors.sort(lambda a, b: cmp(a.lineno, b.lineno))
-        ignoreImportStar = view.settings().get('pyflakes_ignore_import_*', True)
+        ignoreImportStar = get_view_settings(view).get('pyflakes_ignore_import_*', True)
 
         for error in errors:
             try:
@@ -250,25 +569,28 @@ class Linter(BaseLinter):
             if isinstance(error, (Pep8Error, Pep8Warning, OffsetError)):
                 self.underline_range(view, error.lineno, error.offset, underlines)
 
-            elif isinstance(error, (pyflakes.messages.RedefinedWhileUnused,
-                                    pyflakes.messages.UndefinedName,
-                                    pyflakes.messages.UndefinedExport,
+            elif isinstance(error, (pyflakes.messages.UndefinedName,
                                     pyflakes.messages.UndefinedLocal,
-                                    pyflakes.messages.Redefined,
                                     pyflakes.messages.UnusedVariable)):
-                underline_word(error.lineno, error.message, underlines)
+                if not underline_name(error.lineno, error.col, error.message_args[0], underlines):
+                    underline_word(error.lineno, error.message_args[0], underlines)
+
+            elif isinstance(error, (pyflakes.messages.RedefinedWhileUnused,
+                                    pyflakes.messages.UndefinedExport,
+                                    pyflakes.messages.Redefined)):
+                underline_word(error.lineno, error.message_args[0], underlines)
 
             elif isinstance(error, pyflakes.messages.ImportShadowedByLoopVar):
-                underline_for_var(error.lineno, error.message, underlines)
+                underline_for_var(error.lineno, error.message_args[0], underlines)
 
             elif isinstance(error, pyflakes.messages.UnusedImport):
-                underline_import(error.lineno, error.message, underlines)
+                underline_import(error.lineno, error.message_args[0], underlines)
 
             elif isinstance(error, pyflakes.messages.ImportStarUsed):
                 underline_import(error.lineno, '*', underlines)
 
             elif isinstance(error, pyflakes.messages.DuplicateArgument):
-                underline_duplicate_argument(error.lineno, error.message, underlines)
+                underline_duplicate_argument(error.lineno, error.message_args[0], underlines)
 
             elif isinstance(error, pyflakes.messages.LateFutureImport):
                 pass
@@ -1,12 +1,11 @@
-from StringIO import StringIO
-import tempfile
+import json
+import os
+import Queue
+import subprocess
+import threading
+from functools import partial
 
-try:
-    from pylint import checkers
-    from pylint import lint
-    PYLINT_AVAILABLE = True
-except ImportError:
-    PYLINT_AVAILABLE = False
+import sublime
 
 from base_linter import BaseLinter
 
@@ -14,64 +13,199 @@ CONFIG = {
     'language': 'pylint'
 }
 
+# The worker script that keeps a pylint engine alive between lints
+WORKER_PATH = os.path.join(BaseLinter.LIB_PATH, 'pylint_worker.py')
+
+# How long to wait for the worker to start up or to answer a request, in seconds
+WORKER_START_TIMEOUT = 30
+WORKER_TIMEOUT = 10
+
+# Unwanted message ids
+## todo: investigate how this can be set by a user preference
+#  as it appears that the user pylint configuration file is ignored.
+UNWANTED = (
+    'W0312',  # Found indentation with tabs instead of spaces
+)
+
+
+class PylintWorker(object):
+    '''Manages a pylint_worker.py subprocess from a thread of its own, so that
+       neither starting it nor waiting for its answers blocks the editor.
+       Requests are serialized, only the last one of each view is kept, and
+       the subprocess is restarted if it dies or stops responding.'''
+
+    def __init__(self, python, startupinfo=None):
+        self.python = python
+        self.startupinfo = startupinfo
+        self.process = None
+        self.responses = None
+        self.requests = {}
+        self.condition = threading.Condition()
+        self.stopped = False
+
+    def start(self):
+        '''Starts the thread that serves the requests, the subprocess is
+           started by it.'''
+        thread = threading.Thread(target=self.serve, name='pylint worker')
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
+        self.kill()
+
+    def kill(self):
+        process = self.process
+
+        if process is not None:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+            self.process = None
+
+    def submit(self, vid, code, filename, callback):
+        '''Requests a check of code, replacing the pending request of view
+           vid; callback is called with the response in the worker thread.'''
+        with self.condition:
+            self.requests[vid] = (code, filename, callback)
+            self.condition.notify()
+
+    def serve(self):
+        while True:
+            with self.condition:
+                while not self.requests and not self.stopped:
+                    self.condition.wait()
+
+                if self.stopped:
+                    return
+
+                code, filename, callback = self.requests.pop(next(iter(self.requests)))
+
+            callback(self.check(code, filename))
+
+    def start_process(self):
+        '''Starts the subprocess and waits until pylint is loaded.
+           Returns None on success or an error message.'''
+        self.kill()
+        self.responses = Queue.Queue()
+
+        try:
+            self.process = subprocess.Popen([self.python, '-u', WORKER_PATH],
+                                            stdin=subprocess.PIPE,
+                                            stdout=subprocess.PIPE,
+                                            stderr=open(os.devnull, 'w'),
+                                            startupinfo=self.startupinfo)
+        except OSError:
+            self.process = None
+            return '"{0}" cannot be found'.format(self.python)
+
+        reader = threading.Thread(target=self.read_responses, args=(self.process, self.responses))
+        reader.daemon = True
+        reader.start()
+
+        response = self.get_response(WORKER_START_TIMEOUT)
+        return response.get('error')
+
+    def read_responses(self, process, responses):
+        for line in iter(process.stdout.readline, ''):
+            responses.put(line)
+
+        responses.put('')
+
+    def get_response(self, timeout):
+        try:
+            line = self.responses.get(timeout=timeout)
+        except Queue.Empty:
+            self.kill()
+            return {'error': 'the pylint worker timed out'}
+
+        if not line:
+            self.kill()
+            return {'error': 'the pylint worker exited'}
+
+        return json.loads(line)
+
+    def check(self, code, filename):
+        if self.process is None or self.process.poll() is not None:
+            error = self.start_process()
+
+            if error:
+                return {'error': error}
+
+        request = json.dumps({'filename': filename.decode('utf-8'), 'code': code.decode('utf-8')})
+
+        try:
+            self.process.stdin.write(request + '\n')
+            self.process.stdin.flush()
+        except (IOError, OSError, AttributeError):
+            self.kill()
+            return {'error': 'the pylint worker exited'}
+
+        return self.get_response(WORKER_TIMEOUT)
+
 
 class Linter(BaseLinter):
+    # pylint also checks the modules imported by the linted one
+    cacheable = False
+    # pylint checks a module as a whole, and doesn't block while it does
+    lints_regions = False
+    worker = None
+
+    def __init__(self, config):
+        super(Linter, self).__init__(config)
+
+        # The last response for each view: (code, response)
+        self.responses = {}
+
     def get_executable(self, view):
-        return (PYLINT_AVAILABLE, None, 'built in' if PYLINT_AVAILABLE else 'the pylint module could not be imported')
+        python = self.get_mapped_executable(view, 'python')
+
+        # A live worker is kept, unless another python is to be used
+        if self.worker is None or self.worker.python != python:
+            if self.worker is not None:
+                self.worker.stop()
+
+            self.worker = PylintWorker(python, self.get_startupinfo())
+            self.worker.start()
+
+        return (True, None, 'starting a pylint worker running "{0}"'.format(python))
 
     def built_in_check(self, view, code, filename):
-        linter = lint.PyLinter()
-        checkers.initialize(linter)
-
-        # Disable some errors.
-        linter.load_command_line_configuration([
-            '--module-rgx=.*',  # don't check the module name
-            '--reports=n',      # remove tables
-            '--persistent=n',   # don't save the old score (no sense for temp)
-        ])
-
-        temp = tempfile.NamedTemporaryFile(suffix='.py')
-        temp.write(code)
-        temp.flush()
-
-        output_buffer = StringIO()
-        linter.reporter.set_output(output_buffer)
-        linter.check(temp.name)
-        report = output_buffer.getvalue().replace(temp.name, 'line ')
-
-        output_buffer.close()
-        temp.close()
-
-        return report
-
-    def remove_unwanted(self, errors):
-        '''remove unwanted warnings'''
-        ## todo: investigate how this can be set by a user preference
-        #  as it appears that the user pylint configuration file is ignored.
-        lines = errors.split('\n')
-        wanted = []
-        unwanted = ["Found indentation with tabs instead of spaces",
-                    "************* Module"]
-
-        for line in lines:
-            for not_include in unwanted:
-                if not_include in line:
-                    break
-            else:
-                wanted.append(line)
-
-        return '\n'.join(wanted)
+        '''Returns the response for code if it came, otherwise requests it
+           and returns the last response for the view meanwhile; the view
+           is linted again once the response comes.'''
+        last = self.responses.get(view.id())
 
-    def parse_errors(self, view, errors, lines, errorUnderlines, violationUnderlines, warningUnderlines, errorMessages, violationMessages, warningMessages):
-        errors = self.remove_unwanted(errors)
+        if last is not None and last[0] == code:
+            return last[1]
 
-        for line in errors.splitlines():
-            info = line.split(":")
+        self.worker.submit(view.id(), code, filename or '', partial(self.on_response, view, code))
+        return last[1] if last is not None else {}
 
-            try:
-                lineno = info[1]
-            except IndexError:
-                print info
+    def on_response(self, view, code, response):
+        sublime.set_timeout(partial(self.show_response, view, code, response), 0)
+
+    def show_response(self, view, code, response):
+        if view.window() is None:
+            # Closed
+            self.responses.pop(view.id(), None)
+            return
+
+        self.responses[view.id()] = (code, response)
+        view.run_command('lint', self.language)
+
+    def parse_errors(self, view, errors, lines, errorUnderlines, violationUnderlines, warningUnderlines, errorMessages, violationMessages, warningMessages):
+        if 'error' in errors:
+            print 'SublimeLinter: pylint error: {0}'.format(errors['error'])
+            return
+
+        for lineno, col, msg_id, message in errors.get('messages', []):
+            if msg_id in UNWANTED:
+                continue
 
-            message = ":".join(info[2:])
-            self.add_message(int(lineno), lines, message, errorMessages)
+            self.add_message(max(lineno or 1, 1), lines, '[{0}] {1}'.format(msg_id, message), errorMessages)
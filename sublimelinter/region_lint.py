@@ -0,0 +1,168 @@
+'''region_lint.py
+
+Linting a region of a huge file on its own, so that editing it stays
+responsive: on modify, only the lines around the visible region are linted,
+and their results replace those of the same lines in the last result.
+
+A region is extended to whole top level blocks, from a line that starts at
+column 0 to the line before the next one, so that the linted text is valid
+on its own as much as possible. It is linted through a RegionView, a stand-in
+view of its text; linters whose messages depend on the rest of the file can
+look at its full_text (see python.py).
+'''
+
+import re
+
+import sublime
+
+import sublime_stub
+from modules.base_linter import invalidate_view_settings
+
+# Lines that may start a top level block: not indented, not blank, and not
+# continuing a previous block
+TOP_LEVEL_LINE_RE = re.compile(ur'(?![\s)\]}]|(?:else|elif|except|finally|catch)\b)')
+
+# How many lines a region is extended by at most to reach a top level line
+MAX_ALIGN_LINES = 200
+
+
+class StandInView(sublime_stub.View):
+    '''a stand-in view of a copy of the text of the view vid, that can be
+       linted off the main thread'''
+
+    def __init__(self, text, filename, settings, vid, dirty=False):
+        super(StandInView, self).__init__(text, filename, settings)
+        self.dirty = dirty
+
+        # Negative ids never clash with those of real views, and stay the same
+        # for a view, so that linters keeping state by view (see objective-j.py)
+        # can reuse it
+        self._id = -2 * vid
+
+    def is_dirty(self):
+        return self.dirty
+
+
+class RegionView(StandInView):
+    '''a stand-in view of the text of a region, full_text is the text of the
+       whole file and first_row the row of the region in it'''
+
+    def __init__(self, text, filename, settings, vid, full_text, first_row):
+        super(RegionView, self).__init__(text, filename, settings, vid)
+        self._id -= 1
+        self.full_text = full_text
+        self.first_row = first_row
+
+
+def is_top_level(line):
+    return bool(line) and TOP_LEVEL_LINE_RE.match(line) is not None
+
+
+def line_text(view, row):
+    return view.substr(view.line(view.text_point(row, 0)))
+
+
+def window_region(view, first_row, last_row):
+    '''returns (region, first row, end row) of the lines first_row to last_row
+       of view, extended to whole top level blocks; end row is excluded'''
+    row_count = view.rowcol(view.size())[0] + 1
+    first_row = max(0, first_row)
+    last_row = min(last_row, row_count - 1)
+    start = max(0, first_row - MAX_ALIGN_LINES)
+
+    for row in xrange(first_row, start - 1, -1):
+        if is_top_level(line_text(view, row)):
+            start = row
+            break
+
+    end = min(row_count, last_row + 1 + MAX_ALIGN_LINES)
+
+    for row in xrange(last_row + 1, end):
+        if is_top_level(line_text(view, row)):
+            end = row
+            break
+
+    # Trailing blank lines would be reported as the end of the file
+    while end - 1 > start and not line_text(view, end - 1).strip():
+        end -= 1
+
+    begin = view.text_point(start, 0)
+    return sublime.Region(begin, view.full_line(view.text_point(end - 1, 0)).end()), start, end
+
+
+def lint_region(linter, view, settings, text, region, first_row):
+    '''lints the text of region of view on its own, returns the lint result
+       with rows and positions in text; settings are the values of the view
+       settings'''
+    code = text[region.begin():region.end()]
+    filename = view.file_name()
+    view = RegionView(code, filename, settings, view.id(), text, first_row)
+
+    try:
+        result = linter.run(view, code.encode('utf-8'), (filename or '').encode('utf-8'))
+    finally:
+        invalidate_view_settings(view.id())
+
+    return shift_result(result, region.begin(), first_row)
+
+
+def shift_result(result, offset, row_offset):
+    lines, error_underlines, violation_underlines, warning_underlines, errors, violations, warnings = result
+    shifted = [set(row + row_offset for row in lines)]
+    shifted.extend([sublime.Region(region.begin() + offset, region.end() + offset) for region in underlines]
+                   for underlines in (error_underlines, violation_underlines, warning_underlines))
+    shifted.extend(dict((row + row_offset, row_messages) for row, row_messages in messages.iteritems())
+                   for messages in (errors, violations, warnings))
+    return tuple(shifted)
+
+
+def merge_result(previous, result, region, first_row, end_row, size, row_count):
+    '''merges the result of linting region, lines first_row to end_row, into
+       previous, the (size, row count, result) of the last lint of the view.
+       Marks before the region are kept, marks after it are moved by the change
+       in size and line count, assuming that the edits were in the region.'''
+    if previous is None:
+        return result
+
+    previous_size, previous_row_count, previous_result = previous
+    size_change = size - previous_size
+    row_change = row_count - previous_row_count
+
+    def keep_row(row):
+        if row < first_row:
+            return row
+        elif row >= end_row - row_change:
+            return row + row_change
+
+        return None
+
+    def keep_region(old):
+        if old.end() <= region.begin():
+            return old
+        elif old.begin() >= region.end() - size_change:
+            return sublime.Region(old.begin() + size_change, old.end() + size_change)
+
+        return None
+
+    lines = set(row for row in (keep_row(row) for row in previous_result[0]) if row is not None)
+    lines.update(result[0])
+    merged = [lines]
+
+    for old_underlines, underlines in zip(previous_result[1:4], result[1:4]):
+        kept = [kept for kept in (keep_region(old) for old in old_underlines) if kept is not None]
+        kept.extend(underlines)
+        merged.append(kept)
+
+    for old_messages, messages in zip(previous_result[4:], result[4:]):
+        kept = {}
+
+        for row, row_messages in old_messages.iteritems():
+            row = keep_row(row)
+
+            if row is not None:
+                kept[row] = row_messages
+
+        kept.update(messages)
+        merged.append(kept)
+
+    return tuple(merged)
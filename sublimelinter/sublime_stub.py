@@ -0,0 +1,212 @@
+'''sublime_stub.py
+
+A minimal stand-in for the sublime module, used to run the linter modules
+outside of Sublime Text. Only what the linter modules use is implemented.
+'''
+
+import bisect
+import itertools
+import re
+
+DRAW_EMPTY = 1
+HIDE_ON_MINIMAP = 2
+DRAW_EMPTY_AS_OVERWRITE = 4
+DRAW_OUTLINED = 16
+HIDDEN = 128
+ENCODED_POSITION = 1
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+_view_ids = itertools.count(1)
+
+
+def set_timeout(callback, delay):
+    callback()
+
+
+def status_message(message):
+    pass
+
+
+def error_message(message):
+    print message
+
+
+def windows():
+    return []
+
+
+def load_settings(name):
+    # Settings files are not read outside of Sublime Text
+    return Settings()
+
+
+class Region(object):
+    __slots__ = ('a', 'b')
+
+    def __init__(self, a, b=None):
+        self.a = a
+        self.b = a if b is None else b
+
+    def __repr__(self):
+        return '({0}, {1})'.format(self.a, self.b)
+
+    def __eq__(self, other):
+        return isinstance(other, Region) and (self.a, self.b) == (other.a, other.b)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __lt__(self, other):
+        return (self.begin(), self.end()) < (other.begin(), other.end())
+
+    def __hash__(self):
+        return hash((self.a, self.b))
+
+    def begin(self):
+        return min(self.a, self.b)
+
+    def end(self):
+        return max(self.a, self.b)
+
+    def size(self):
+        return self.end() - self.begin()
+
+    def empty(self):
+        return self.a == self.b
+
+    def contains(self, x):
+        if isinstance(x, Region):
+            return self.begin() <= x.begin() and x.end() <= self.end()
+
+        return self.begin() <= x <= self.end()
+
+    def intersects(self, other):
+        return self.begin() < other.end() and other.begin() < self.end()
+
+    def cover(self, other):
+        return Region(min(self.begin(), other.begin()), max(self.end(), other.end()))
+
+
+class Settings(object):
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    def has(self, key):
+        return key in self.values
+
+    def erase(self, key):
+        self.values.pop(key, None)
+
+    def add_on_change(self, key, callback):
+        pass
+
+    def clear_on_change(self, key):
+        pass
+
+
+class View(object):
+    '''a read-only view of a file's text'''
+
+    def __init__(self, text, filename=None, settings=None):
+        self.text = text
+        self.filename = filename
+        self._id = next(_view_ids)
+        self._settings = Settings(settings)
+        self.line_starts = [0]
+
+        for match in re.finditer(u'\n', text):
+            self.line_starts.append(match.end())
+
+    def id(self):
+        return self._id
+
+    def buffer_id(self):
+        return self._id
+
+    def file_name(self):
+        return self.filename
+
+    def settings(self):
+        return self._settings
+
+    def window(self):
+        return None
+
+    def is_scratch(self):
+        return False
+
+    def is_dirty(self):
+        return False
+
+    def size(self):
+        return len(self.text)
+
+    def sel(self):
+        return []
+
+    def substr(self, x):
+        if isinstance(x, Region):
+            return self.text[x.begin():x.end()]
+
+        return self.text[x:x + 1]
+
+    def rowcol(self, point):
+        row = bisect.bisect_right(self.line_starts, point) - 1
+        return row, point - self.line_starts[row]
+
+    def text_point(self, row, col):
+        row = max(0, min(row, len(self.line_starts) - 1))
+        return min(self.line_starts[row] + col, len(self.text))
+
+    def full_line(self, x):
+        if isinstance(x, Region):
+            row, last_row = self.rowcol(x.begin())[0], self.rowcol(x.end())[0]
+        else:
+            row = last_row = self.rowcol(x)[0]
+
+        if last_row + 1 < len(self.line_starts):
+            end = self.line_starts[last_row + 1]
+        else:
+            end = len(self.text)
+
+        return Region(self.line_starts[row], end)
+
+    def line(self, x):
+        region = self.full_line(x)
+        end = region.end()
+
+        if end > region.begin() and self.text[end - 1] == u'\n':
+            end -= 1
+
+        return Region(region.begin(), end)
+
+    def lines(self, region):
+        first = self.rowcol(region.begin())[0]
+        last = self.rowcol(region.end())[0]
+        return [self.line(self.line_starts[row]) for row in xrange(first, last + 1)]
+
+    def word(self, x):
+        point = x.begin() if isinstance(x, Region) else x
+        line = self.line(point)
+
+        for match in WORD_RE.finditer(self.text, line.begin(), line.end()):
+            if match.start() <= point <= match.end():
+                return Region(match.start(), match.end())
+
+        return Region(point, point)
+
+    def extract_scope(self, point):
+        return self.line(point)
+
+    def score_selector(self, point, selector):
+        return 0
+
+    def match_selector(self, point, selector):
+        return False
@@ -0,0 +1,122 @@
+'''tracing.py
+
+Records what the linting pipeline does as Chrome trace events: lints queued,
+delayed and dispatched, the phases of each lint and painting the marks. The
+saved file can be loaded in chrome://tracing or https://ui.perfetto.dev.
+
+Tracing is off unless the "sublimelinter_trace" setting is true. Events are
+kept in a ring buffer of the last TRACE_BUFFER_SIZE events, so tracing can be
+left on; when it is off, recording an event is a single attribute check.
+'''
+
+from collections import deque
+import json
+import os
+import threading
+import time
+
+TRACE_BUFFER_SIZE = 100000
+
+
+class NoSpan(object):
+    '''the span used when tracing is off'''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        pass
+
+NO_SPAN = NoSpan()
+
+
+class Span(object):
+    '''context manager recording a begin and an end event'''
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.tracer.event('B', self.name, self.category, self.args)
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.tracer.event('E', self.name, self.category, None)
+
+
+class Tracer(object):
+    def __init__(self, size=TRACE_BUFFER_SIZE):
+        self.enabled = False
+        self.events = deque(maxlen=size)
+        self.pid = os.getpid()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def event(self, phase, name, category, args=None):
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': phase,
+            'ts': time.time() * 1000000,
+            'pid': self.pid,
+            'tid': threading.current_thread().ident,
+        }
+
+        if args:
+            event['args'] = args
+
+        if phase == 'i':
+            event['s'] = 't'
+
+        # Appending to a deque is thread safe, no lock needed
+        self.events.append(event)
+
+    def span(self, name, category, **args):
+        '''returns a context manager tracing a block as a span'''
+        if not self.enabled:
+            return NO_SPAN
+
+        return Span(self, name, category, args)
+
+    def instant(self, name, category, **args):
+        if self.enabled:
+            self.event('i', name, category, args)
+
+    def clear(self):
+        self.events.clear()
+
+    def trace(self):
+        '''returns the recorded events as a Chrome trace'''
+        events = list(self.events)
+        threads = dict((thread.ident, thread.name) for thread in threading.enumerate())
+
+        for tid in set(event['tid'] for event in events):
+            events.append({
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': self.pid,
+                'tid': tid,
+                'args': {'name': threads.get(tid, str(tid))},
+            })
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save(self, path):
+        '''writes the trace to path, returns the number of events written'''
+        trace = self.trace()
+        directory = os.path.dirname(path)
+
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        with open(path, 'wb') as f:
+            json.dump(trace, f)
+
+        return len(self.events)
+
+
+TRACER = Tracer()